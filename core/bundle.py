@@ -0,0 +1,66 @@
+# core/bundle.py
+# Packs a mutated multi-module template into one self-contained Python source.
+# Backend nodes, the disk snapshot and the in-memory hand-off all deal in the
+# source of a single module exposing `app`, so a package template travels as a
+# module that embeds every mutated submodule and imports them through a private
+# finder. Imports between the embedded modules (relative, or qualified with
+# the package name) resolve to the embedded copies, never to the clean files
+# on disk. Loading a bundle first drops the previous generation's copies from
+# sys.modules, so every generation imports its own modules fresh.
+
+from typing import Dict, Tuple
+
+BUNDLE_LOADER = '''
+import importlib as _importlib
+import importlib.abc as _abc
+import importlib.util as _util
+import sys as _sys
+
+
+class _BundleFinder(_abc.MetaPathFinder, _abc.Loader):
+    def _name(self, fullname):
+        if fullname == _ROOT:
+            return ""
+        if fullname.startswith(_ROOT + "."):
+            return fullname[len(_ROOT) + 1:]
+        return None
+
+    def find_spec(self, fullname, path=None, target=None):
+        name = self._name(fullname)
+        if name is None or name not in _MODULES:
+            return None
+        return _util.spec_from_loader(fullname, self, is_package=_MODULES[name][0])
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, module):
+        source = _MODULES[self._name(module.__name__)][1]
+        exec(compile(source, "<chameleon bundle " + module.__name__ + ">", "exec"), module.__dict__)
+
+
+def _load():
+    for name in [name for name in _sys.modules if name == _ROOT or name.startswith(_ROOT + ".")]:
+        del _sys.modules[name]
+    finder = _BundleFinder()
+    _sys.meta_path.insert(0, finder)
+    try:
+        return _importlib.import_module(_ROOT + "." + _ENTRY if _ENTRY else _ROOT).app
+    finally:
+        _sys.meta_path.remove(finder)
+
+
+app = _load()
+'''
+
+def render_bundle(root: str, entry: str, modules: Dict[str, Tuple[bool, str]]) -> str:
+    # modules: bundle-relative name -> (is_package, mutated source). A package
+    # template without an __init__.py still gets an (empty) root package.
+    modules = {"": (True, ""), **modules}
+    return (
+        f"# Generated by core/mutator.py from the {root!r} template package.\n"
+        f"_ROOT = {root!r}\n"
+        f"_ENTRY = {entry!r}\n"
+        f"_MODULES = {modules!r}\n"
+        + BUNDLE_LOADER
+    )
@@ -0,0 +1,145 @@
+# core/events.py
+# Structured event pipeline for the proxy. Request handlers only append a small
+# tuple to an in-memory ring buffer; a background task drains it in batches and
+# hands them to a worker thread that writes JSON lines (and, optionally, the
+# familiar colored console lines). Nothing on the request path touches stdout
+# or disk. High-volume forward events are sampled, and when the buffer is full
+# new events are dropped and counted instead of blocking the caller.
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from colorama import Fore, Style
+
+# Console rendering per event kind: (label, message template, color).
+CONSOLE_FORMATS = {
+    "forward": ("PROXY", "Forwarding: {path} -> {target} (gen {generation})", Fore.CYAN),
+    "intrusion": ("SECURITY", "⚠️ INTRUSION DETECTED ({classification}): {path}", Fore.RED),
+    "mutation": ("MUTATOR", "Generation {generation} prepared in {duration_ms:.1f} ms", Fore.YELLOW),
+    "switch": ("SWITCH", "Traffic re-routed to Node {node}", Fore.GREEN),
+    "node": ("NODES", "Node {node} is {status}", Fore.MAGENTA),
+    "system": ("SYSTEM", "{message}", Fore.CYAN),
+    "warning": ("PROXY", "{message}", Fore.YELLOW),
+    "error": ("ERROR", "{message}", Fore.RED),
+}
+
+class EventLog:
+    def __init__(self, path: Optional[str], capacity: int = 8192, batch_size: int = 256,
+                 flush_interval: float = 0.5, forward_sample: int = 1, console: bool = True,
+                 max_bytes: int = 50 * 1024 * 1024):
+        self.path = path or None
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.forward_sample = max(1, forward_sample)
+        self.console = console
+        self.max_bytes = max_bytes
+        self.buffer: Deque[tuple] = deque()
+        self.emitted = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.written = 0
+        self._forward_seen = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._file = None
+
+    def emit(self, kind: str, **fields):
+        # Hot-path entry point: O(1), never blocks, never raises.
+        if kind == "forward":
+            self._forward_seen += 1
+            if self._forward_seen % self.forward_sample:
+                self.sampled_out += 1
+                return
+        if len(self.buffer) >= self.capacity:
+            self.dropped += 1
+            return
+        self.buffer.append((time.time(), kind, fields))
+        self.emitted += 1
+        if len(self.buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._writer = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # Flushes whatever is still buffered before shutdown.
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+        while self.buffer:
+            await asyncio.to_thread(self._write, self._take_batch())
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self.buffer:
+                await asyncio.to_thread(self._write, self._take_batch())
+
+    def _take_batch(self) -> list:
+        batch = []
+        while self.buffer and len(batch) < self.batch_size:
+            batch.append(self.buffer.popleft())
+        return batch
+
+    def _write(self, batch: list):
+        # Runs in a worker thread: all serialization and I/O happens here.
+        if self.path:
+            try:
+                self._rotate_if_needed()
+                if self._file is None:
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write("".join(
+                    json.dumps({"ts": ts, "event": kind, **fields}, default=str) + "\n"
+                    for ts, kind, fields in batch
+                ))
+                self._file.flush()
+            except OSError as e:
+                print(f"[EVENTS][ERROR] Failed writing {self.path}: {e}")
+        if self.console:
+            print("\n".join(self._console_line(kind, fields) for _, kind, fields in batch), flush=True)
+        self.written += len(batch)
+
+    def _rotate_if_needed(self):
+        if self._file is not None and self._file.tell() >= self.max_bytes:
+            self._file.close()
+            self._file = None
+            os.replace(self.path, f"{self.path}.1")
+
+    @staticmethod
+    def _console_line(kind: str, fields: Dict) -> str:
+        label, template, color = CONSOLE_FORMATS.get(kind, (kind.upper(), "{message}", Fore.WHITE))
+        try:
+            message = template.format(**fields)
+        except (KeyError, ValueError):
+            message = json.dumps(fields, default=str)
+        line = f"{color}[{label}] {message}{Style.RESET_ALL}"
+        if "traceback" in fields:
+            line += "\n" + fields["traceback"]
+        return line
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "buffered": len(self.buffer),
+            "capacity": self.capacity,
+            "emitted": self.emitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+        }
@@ -0,0 +1,94 @@
+# core/generations.py
+# Tracks mutation generations inside the proxy. A rotation does not simply
+# overwrite the active mapping: the outgoing generation stays resolvable for a
+# grace window so requests that were already routed to it (or are still being
+# held by the proxy) drain against the node that actually serves those routes.
+# Generations are reference counted and released once the window has passed
+# and no request holds them any more. Each generation is served by a cohort of
+# backend nodes; nodes.NodePool decides which cohort member takes a request.
+
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+class Generation:
+    __slots__ = ("id", "mapping", "index", "nodes", "created_at", "retired_at", "refs")
+
+    def __init__(self, generation_id: int, mapping: Dict[str, str], index, nodes: List[Dict[str, str]]):
+        self.id = generation_id
+        self.mapping = mapping
+        self.index = index          # routing.RouteIndex compiled for this generation
+        self.nodes = list(nodes)    # backend nodes warmed against this generation's source
+        self.created_at = time.monotonic()
+        self.retired_at: Optional[float] = None
+        self.refs = 0
+
+    def __repr__(self):
+        return f"<Generation {self.id} nodes={[node['name'] for node in self.nodes]} refs={self.refs}>"
+
+class GenerationTable:
+    def __init__(self, grace_window: float):
+        self.grace_window = grace_window
+        self.current: Optional[Generation] = None
+        self.retired: Deque[Generation] = deque()
+        self._next_id = 1
+
+    def next_id(self) -> int:
+        generation_id = self._next_id
+        self._next_id += 1
+        return generation_id
+
+    def publish(self, generation: Generation):
+        # Makes a generation current; the previous one enters its grace window.
+        self._next_id = max(self._next_id, generation.id + 1)
+        if self.current is not None:
+            self.current.retired_at = time.monotonic()
+            self.retired.appendleft(self.current)
+        self.current = generation
+        self.expire()
+
+    def expire(self, now: Optional[float] = None):
+        # Frees retired generations whose window has passed and that no request
+        # still references. Oldest generations sit at the right of the deque.
+        now = time.monotonic() if now is None else now
+        while self.retired:
+            oldest = self.retired[-1]
+            if oldest.refs > 0 or now - oldest.retired_at < self.grace_window:
+                break
+            self.retired.pop()
+
+    def in_grace(self, generation: Generation, now: float) -> bool:
+        return now - generation.retired_at < self.grace_window
+
+    def acquire(self, method: str, path: str) -> Optional[Tuple[Generation, str]]:
+        # Resolves against the current generation first, then against retired
+        # generations that are still inside their grace window. The returned
+        # generation is pinned until release() is called.
+        if self.current is not None:
+            target = self.current.index.resolve(method, path)
+            if target is not None:
+                self.current.refs += 1
+                return self.current, target
+
+        now = time.monotonic()
+        for generation in self.retired:
+            if not self.in_grace(generation, now):
+                break
+            target = generation.index.resolve(method, path)
+            if target is not None:
+                generation.refs += 1
+                return generation, target
+        return None
+
+    def release(self, generation: Generation):
+        generation.refs -= 1
+
+    def busy(self, node: Dict[str, str]) -> bool:
+        # True while a retired generation on this node is still draining, which
+        # means the node must not be reloaded with new source yet.
+        now = time.monotonic()
+        self.expire(now)
+        return any(
+            node in generation.nodes and (generation.refs > 0 or self.in_grace(generation, now))
+            for generation in self.retired
+        )
@@ -0,0 +1,188 @@
+# core/guards.py
+# Raw ASGI middleware that runs in front of the proxy's FastAPI routing. These
+# guards look only at the connection scope, so requests they turn away never
+# reach request parsing, the catch-all route or dependency handling.
+#
+# ReputationShield handles clients whose reputation score crossed a threshold
+# (in practice, scanners that already tripped the honeypot repeatedly) with
+# one of three policies:
+#   tarpit     hold the request in the shared tarpit, then answer with a decoy
+#   ratelimit  let a trickle through per IP (token bucket) and 429 the rest
+#   close      answer 403 at once and close the connection
+#
+# BodyLimitGuard caps request bodies, globally or per route. A declared
+# Content-Length over the limit is answered with 413 before a single body byte
+# is read. Chunked (or understated) bodies are counted as the app pulls them, so
+# an upload is cut off as soon as it crosses the limit, not after it has been
+# buffered. Bodies nobody reads, such as requests routed to the honeypot, are
+# never pulled at all: the server pauses the socket once its small receive
+# buffer is full.
+
+import json
+import time
+from typing import Callable, Dict, Optional
+
+POLICIES = ("tarpit", "ratelimit", "close")
+
+class TokenBuckets:
+    # Per-key token buckets with a bounded number of tracked keys. A dict keeps
+    # insertion order, so re-inserting on use makes the first key the least
+    # recently seen one to evict.
+    def __init__(self, rate: float, burst: float, capacity: int = 100000):
+        self.rate = rate
+        self.burst = burst
+        self.capacity = capacity
+        self.buckets: Dict[str, tuple] = {}
+
+    def allow(self, key: str, now: float) -> bool:
+        tokens, last = self.buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        allowed = tokens >= 1.0
+        if allowed:
+            tokens -= 1.0
+        self.buckets[key] = (tokens, now)
+        if len(self.buckets) > self.capacity:
+            del self.buckets[next(iter(self.buckets))]
+        return allowed
+
+async def send_bytes(send, status: int, body: bytes = b"", content_type: bytes = b"application/json",
+                     headers: Optional[list] = None):
+    # Minimal raw ASGI response that also asks the server to drop the connection.
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"connection", b"close"),
+            *(headers or []),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class ReputationShield:
+    def __init__(self, app, score: Callable[[str], float], threshold: float, policy: str = "tarpit",
+                 tarpit=None, decoy: Optional[Callable[[str, str], bytes]] = None, hold: float = 1.0,
+                 rate: float = 1.0, burst: float = 5.0, on_block: Optional[Callable[[str], None]] = None,
+                 exempt: Optional[Callable[[dict], bool]] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown shield policy {policy!r}; expected one of {POLICIES}")
+        if policy == "tarpit" and (tarpit is None or decoy is None):
+            raise ValueError("the tarpit policy needs a tarpit and a decoy renderer")
+        self.app = app
+        self.score = score
+        self.threshold = threshold
+        self.policy = policy
+        self.tarpit = tarpit
+        self.decoy = decoy
+        self.hold = hold
+        self.buckets = TokenBuckets(rate, burst) if policy == "ratelimit" else None
+        self.on_block = on_block or (lambda action: None)
+        # Requests the shield never judges, e.g. the operator's own dashboard.
+        self.exempt = exempt or (lambda scope: False)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket") or self.exempt(scope):
+            await self.app(scope, receive, send)
+            return
+        client = scope.get("client")
+        ip = client[0] if client else ""
+        if self.score(ip) < self.threshold:
+            await self.app(scope, receive, send)
+            return
+
+        if self.policy == "ratelimit":
+            if self.buckets.allow(ip, time.monotonic()):
+                await self.app(scope, receive, send)
+                return
+            self.on_block("ratelimited")
+            await self._reject(scope, send, 429, [(b"retry-after", b"10")])
+            return
+
+        if self.policy == "tarpit" and scope["type"] == "http":
+            lease = self.tarpit.enter(ip)
+            if lease is None:
+                self.on_block("shed")
+                await self._reject(scope, send, 429, [(b"retry-after", b"10")])
+                return
+            try:
+                await self.tarpit.delay(self.hold)
+            finally:
+                lease.release()
+            self.on_block("tarpitted")
+            await send_bytes(send, 200, self.decoy(ip, scope["path"]))
+            return
+
+        self.on_block("closed")
+        await self._reject(scope, send, 403)
+
+    @staticmethod
+    async def _reject(scope, send, status: int, headers: Optional[list] = None):
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1008})
+            return
+        await send_bytes(send, status, headers=headers)
+
+class BodyLimitExceeded(Exception):
+    # Raised from the guarded receive() once a streamed body crosses its limit.
+    # Anything relaying the body (such as the proxy's upstream send) must let it
+    # propagate so the guard can answer 413.
+    pass
+
+class BodyLimitGuard:
+    def __init__(self, app, limit_for: Callable[[str, str], int],
+                 on_reject: Optional[Callable[[str], None]] = None):
+        self.app = app
+        self.limit_for = limit_for
+        self.on_reject = on_reject or (lambda how: None)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limit = self.limit_for(scope["method"], scope["path"])
+        declared = None
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    await send_bytes(send, 400, b'{"error":"Invalid Content-Length"}')
+                    return
+                break
+        if declared is not None and declared > limit:
+            self.on_reject("declared")
+            await self._too_large(send, limit)
+            return
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise BodyLimitExceeded(limit)
+            return message
+
+        async def tracking_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except BodyLimitExceeded:
+            self.on_reject("streamed")
+            # Once a response is under way there is nothing left to tell the
+            # client; returning early makes the server drop the connection.
+            if not started:
+                await self._too_large(send, limit)
+
+    @staticmethod
+    async def _too_large(send, limit: int):
+        body = json.dumps({"error": "Request body too large", "limit": limit}).encode("utf-8")
+        await send_bytes(send, 413, body)
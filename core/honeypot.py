@@ -0,0 +1,119 @@
+# core/honeypot.py
+# Decoy responses for requests that hit stale or unknown routes. A pool of
+# plausible fake payloads is rendered once, at startup, straight to JSON bytes.
+# Each variant keeps a fixed-width slot for a token, so serving one is a slice
+# join rather than a serialisation. The variant and the token are derived from a
+# keyed hash of (client IP, path). The same attacker probing the same path keeps
+# getting the same "leak", but two attackers never see identical payloads.
+# Recently served decoys sit in an LRU, so a scan flood mostly costs a dict
+# lookup.
+
+import hashlib
+import json
+import random
+import secrets
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+TOKEN_SLOT = "__chameleon_token__"
+TOKEN_BYTES = 16  # rendered as 32 hex characters
+
+FIRST_NAMES = ["alice", "bob", "carol", "dave", "erin", "frank", "grace", "heidi", "ivan", "judy", "mallory", "oscar"]
+LAST_NAMES = ["adams", "baker", "chen", "diaz", "evans", "fischer", "garcia", "hughes", "ito", "jensen", "khan", "lopez"]
+DOMAINS = ["corp.internal", "prod.local", "ops.example.com", "intra.net"]
+ROLES = ["admin", "superuser", "ops", "billing_admin", "support_lead", "dba"]
+PERMISSIONS = [
+    ["read", "write", "delete"],
+    ["users:*", "billing:*"],
+    ["*"],
+    ["db:read", "db:write", "db:export"],
+    ["admin:console", "audit:read"],
+]
+ACCOUNT_FLAGS = ["ACTIVE", "MFA_EXEMPT", "SERVICE_ACCOUNT", "PASSWORD_NEVER_EXPIRES", "LEGACY_SSO"]
+MESSAGES = [
+    "Export ready.",
+    "Session established.",
+    "Backup snapshot attached.",
+    "Credentials rotated successfully.",
+]
+
+def _fake_user(rng: random.Random) -> Dict:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        "id": rng.randint(1000, 99999),
+        "username": f"{first}.{last}",
+        "email": f"{first}.{last}@{rng.choice(DOMAINS)}",
+        "role": rng.choice(ROLES),
+        "permissions": rng.choice(PERMISSIONS),
+        "account_flag": rng.choice(ACCOUNT_FLAGS),
+        "last_login": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00Z",
+    }
+
+def _fake_payload(rng: random.Random) -> Dict:
+    # A handful of response shapes, so the decoys do not share one schema.
+    user = _fake_user(rng)
+    shape = rng.randrange(3)
+    if shape == 0:
+        return {
+            "status": "ok",
+            "user_data": user,
+            "session": {"token": TOKEN_SLOT, "expires_in": rng.choice([900, 3600, 86400])},
+        }
+    if shape == 1:
+        return {
+            "status": "success",
+            "user_data": user,
+            "records": [_fake_user(rng) for _ in range(rng.randint(2, 5))],
+            "export_id": TOKEN_SLOT,
+        }
+    return {
+        "result": "granted",
+        "user_data": user,
+        "api_key": f"sk_live_{TOKEN_SLOT}",
+        "system_message": rng.choice(MESSAGES),
+    }
+
+class HoneypotEngine:
+    def __init__(self, key: Optional[bytes] = None, pool_size: int = 64, cache_size: int = 10000):
+        # Workers that share a key render the same pool and pick the same
+        # variant for a given attacker, so replies stay consistent across them.
+        self.key = key or secrets.token_bytes(32)
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[bytes, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        rng = random.Random(hashlib.blake2b(b"pool", key=self.key).digest())
+        self.pool: List[Tuple[bytes, bytes]] = [self._render(_fake_payload(rng)) for _ in range(pool_size)]
+
+    @staticmethod
+    def _render(payload: Dict) -> Tuple[bytes, bytes]:
+        # Serialises once and splits around the token slot.
+        data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        prefix, _, suffix = data.partition(TOKEN_SLOT.encode("ascii"))
+        return prefix, suffix
+
+    def render(self, ip: str, path: str) -> bytes:
+        # The LRU is keyed by the digest rather than the raw path, so memory
+        # stays bounded whatever the attacker puts in the URL.
+        digest = hashlib.blake2b(f"{ip}\0{path}".encode("utf-8", "surrogatepass"),
+                                 key=self.key, digest_size=TOKEN_BYTES + 4).digest()
+        body = self.cache.get(digest)
+        if body is not None:
+            self.cache.move_to_end(digest)
+            self.hits += 1
+            return body
+        self.misses += 1
+        prefix, suffix = self.pool[int.from_bytes(digest[:4], "big") % len(self.pool)]
+        body = prefix + digest[4:].hex().encode("ascii") + suffix
+        self.cache[digest] = body
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return body
+
+    def stats(self) -> Dict:
+        return {
+            "variants": len(self.pool),
+            "cached": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,143 @@
+# core/metrics.py
+# Low-overhead runtime telemetry for the proxy. Counters are plain integers
+# bumped from the event loop thread, so no locks are involved, and latencies go
+# into fixed log-scale histograms whose cost per observation is one bisect and
+# one increment. Readers never touch live state directly: snapshot() builds a
+# compact JSON document that the proxy caches and serves as-is.
+#
+# With several proxy workers every worker keeps its own Metrics. export() turns
+# one into plain data that can cross processes and absorb() adds such data into
+# another, so a snapshot can cover all workers (see core/shared.py).
+
+import time
+from bisect import bisect_left
+from typing import Dict, List
+
+# Bucket upper bounds in milliseconds: 0.05 ms doubling up to ~52 s.
+DEFAULT_BOUNDS_MS = [0.05 * 2 ** i for i in range(21)]
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "total", "sum")
+
+    def __init__(self, bounds: List[float] = DEFAULT_BOUNDS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last bucket catches overflow
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value_ms: float):
+        self.counts[bisect_left(self.bounds, value_ms)] += 1
+        self.total += 1
+        self.sum += value_ms
+
+    def export(self) -> List:
+        return [self.counts, self.total, self.sum]
+
+    def absorb(self, exported: List):
+        counts, total, total_sum = exported
+        if len(counts) != len(self.counts):
+            return
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, counts)]
+        self.total += total
+        self.sum += total_sum
+
+    def quantile(self, q: float) -> float:
+        # Upper bound of the bucket holding the q-th observation.
+        if not self.total:
+            return 0.0
+        rank = q * self.total
+        seen = 0
+        for position, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.bounds[position] if position < len(self.bounds) else float("inf")
+        return self.bounds[-1]
+
+    def snapshot(self) -> Dict:
+        return {
+            "count": self.total,
+            "mean_ms": round(self.sum / self.total, 3) if self.total else 0.0,
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+        }
+
+class Metrics:
+    def __init__(self):
+        self.started_at = time.time()
+        self.counters: Dict[str, int] = {
+            "forwards": 0,
+            "forward_errors": 0,
+            "intrusions": 0,
+            "rotations": 0,
+            "mutation_failures": 0,
+        }
+        self.histograms: Dict[str, Histogram] = {
+            "forward_latency": Histogram(),
+            "mutation_duration": Histogram(),
+        }
+        self.last_rotation_at = 0.0
+        self.last_intrusion_at = 0.0
+        self.last_intrusion_path = ""
+        self.last_intrusion_class = ""
+
+    def incr(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, value_ms: float):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(value_ms)
+
+    def intrusion(self, path: str, classification: str = ""):
+        self.counters["intrusions"] += 1
+        if classification:
+            self.incr("intrusions_" + classification.replace("-", "_"))
+        self.last_intrusion_at = time.time()
+        self.last_intrusion_path = path
+        self.last_intrusion_class = classification
+
+    def export(self) -> Dict:
+        return {
+            "started_at": self.started_at,
+            "counters": dict(self.counters),
+            "histograms": {name: histogram.export() for name, histogram in self.histograms.items()},
+            "last_rotation_at": self.last_rotation_at,
+            "last_intrusion_at": self.last_intrusion_at,
+            "last_intrusion_path": self.last_intrusion_path,
+            "last_intrusion_class": self.last_intrusion_class,
+        }
+
+    def absorb(self, exported: Dict):
+        # Counters and histograms add up; the latest rotation and intrusion win.
+        self.started_at = min(self.started_at, exported["started_at"])
+        for name, value in exported["counters"].items():
+            self.incr(name, value)
+        for name, histogram in exported["histograms"].items():
+            self.histograms.setdefault(name, Histogram()).absorb(histogram)
+        self.last_rotation_at = max(self.last_rotation_at, exported["last_rotation_at"])
+        if exported["last_intrusion_at"] > self.last_intrusion_at:
+            self.last_intrusion_at = exported["last_intrusion_at"]
+            self.last_intrusion_path = exported["last_intrusion_path"]
+            self.last_intrusion_class = exported["last_intrusion_class"]
+
+    def rotation(self, duration_ms: float):
+        self.counters["rotations"] += 1
+        self.last_rotation_at = time.time()
+        self.observe("mutation_duration", duration_ms)
+
+    def snapshot(self, **gauges) -> Dict:
+        # Gauges (active node, generation, tarpit occupancy, ...) are passed in
+        # by the owner so this module stays independent of proxy internals.
+        return {
+            "ts": time.time(),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "counters": dict(self.counters),
+            "histograms": {name: histogram.snapshot() for name, histogram in self.histograms.items()},
+            "last_rotation_at": self.last_rotation_at,
+            "last_intrusion_at": self.last_intrusion_at,
+            "last_intrusion_path": self.last_intrusion_path,
+            "last_intrusion_class": self.last_intrusion_class,
+            **gauges,
+        }
@@ -1,22 +1,43 @@
 # core/mutator.py
 # This module is responsible for generating the mutated server at runtime.
-# It reads the clean template, rewrites all routes using AST manipulation,
-# and writes the mutated version both to the project directory (for local runs)
-# and to /tmp, which is the safe writable location in cloud environments.
+# It reads the clean template (one module, or a package of router modules),
+# indexes all routes using AST manipulation (once per module revision), fills
+# in fresh randomized routes each cycle, and hands the result to the proxy in
+# memory. The proxy pushes the source straight to the backend nodes; writing
+# it to the project directory (for local runs) and to /tmp is a snapshot for
+# restarts and tooling, never a hand-off step.
 
 import ast
+import re
 import secrets
 import string
 import os
 import json
+import time
 import traceback
-from typing import Dict
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# Sibling core modules are imported by file location, matching core/proxy.py.
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from routing import RouteIndex  # type: ignore
+from template_index import TemplatePackage, load_template_package, keyword_arg  # type: ignore
+from bundle import render_bundle  # type: ignore
+from profiling import note_stage, drain_stages  # type: ignore
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-TEMPLATE_PATH = os.path.join(BASE_DIR, "target_app", "template.py")
+# The clean template: a module exposing `app`, or a package directory whose
+# modules define it and the routers it mounts. Relative paths are taken from
+# the project root.
+TEMPLATE_PATH = os.path.join(BASE_DIR, os.environ.get("CHAMELEON_TEMPLATE", os.path.join("target_app", "template.py")))
 PROJECT_OUTPUT_PATH = os.path.join(BASE_DIR, "target_app", "active_server.py")  # optional local output for convenience
 RUNTIME_OUTPUT_PATH = "/tmp/active_server.py"  # primary executable output used by the running system
 STATE_PATH = "/tmp/mutation_state.json"       # stores the latest route mapping
+# Per-route mutation policies, kept next to the template. Routes without an
+# entry use the defaults; exempt routes are never renamed.
+POLICY_PATH = os.path.join(BASE_DIR, "target_app", "mutation_policy.json")
+DEFAULT_POLICY = {"default": {"hash_length": 6}, "routes": {"/": {"exempt": True}}}
 
 def generate_chaos_string(length=6):
     # Generates a short randomized suffix used to mutate endpoint paths.
@@ -24,40 +45,269 @@ def generate_chaos_string(length=6):
     chars = string.ascii_lowercase + string.digits
     return ''.join(secrets.choice(chars) for _ in range(length))
 
-class ChaosTransformer(ast.NodeTransformer):
-    # Traverses the FastAPI template and rewrites decorated endpoints.
-    # It tracks both original and mutated paths so the proxy can remap traffic.
-    def __init__(self):
-        self.route_map: Dict[str, str] = {}
+# Placeholders substituted into the template while indexing it. They survive
+# ast.unparse verbatim, so the rendered skeleton can be split around them once
+# and every later mutation is a plain string join over the route slots.
+PATH_SLOT = "__chameleon_path_{}__"
+FUNC_SLOT = "__chameleon_func_{}__"
+SLOT_PATTERN = re.compile(r"""(['"])__chameleon_path_(\d+)__\1|__chameleon_func_(\d+)__""")
+
+class ChaosTransformer:
+    # Renders one template module with its mutable route strings and handler
+    # names replaced by numbered placeholders. The placeholders are set on the
+    # module's cached tree only for the duration of ast.unparse and then put
+    # back, so the parsed module can be reused by the next revision. Exempt
+    # routes on flattened routers get their full path written in; so do the
+    # prefixes that flattening moves into the route strings.
+    def __init__(self, module, entries: List[tuple], cleared: List[ast.keyword]):
+        self.module = module
+        self.entries = entries    # (route declaration, "slot" | "fixed", effective path)
+        self.cleared = cleared    # prefix arguments emptied by flattening
+        self.path_slots: List[str] = []   # slot index -> original route path
+        self.func_slots: List[tuple] = [] # slot index -> (function name, original route path)
+
+    def render(self) -> str:
+        saved = []
+        renamed = set()
+        for decl, action, effective in self.entries:
+            saved.append((decl.path_node, "value", decl.path_node.value))
+            if action == "fixed":
+                decl.path_node.value = effective
+                continue
+            decl.path_node.value = PATH_SLOT.format(len(self.path_slots))
+            self.path_slots.append(effective)
+
+            # The handler is renamed alongside its first mutated route.
+            if id(decl.function) not in renamed:
+                renamed.add(id(decl.function))
+                saved.append((decl.function, "name", decl.function.name))
+                self.func_slots.append((decl.function.name, effective))
+                decl.function.name = FUNC_SLOT.format(len(self.func_slots) - 1)
+        for keyword in self.cleared:
+            saved.append((keyword.value, "value", keyword.value.value))
+            keyword.value.value = ""
+        started = time.perf_counter()
+        try:
+            return ast.unparse(self.module.tree)
+        finally:
+            note_stage("mutation.unparse", started)
+            for node, attribute, value in reversed(saved):
+                setattr(node, attribute, value)
+
+def mutate_path(original_path: str, mutation_hash: str) -> str:
+    # Suffixes the last static segment so path parameters stay intact:
+    # /admin/login -> /admin/login_x1, /users/{id} -> /users_x1/{id}.
+    segments = original_path.split("/")
+    for position in range(len(segments) - 1, -1, -1):
+        if segments[position] and not segments[position].startswith("{"):
+            segments[position] = f"{segments[position]}_{mutation_hash}"
+            return "/".join(segments)
+    # Nothing static to rename (e.g. "/{id}"): prepend a mutated segment.
+    return f"/_{mutation_hash}{original_path}"
+
+def mutated_segment(original_path: str, mutated_path: str) -> Optional[Tuple[int, str, str]]:
+    # Inverse of mutate_path: (position, mutated segment, original segment) of
+    # the segment that was renamed, or None when the path was left as is.
+    original, mutated = original_path.split("/"), mutated_path.split("/")
+    if len(mutated) == len(original) + 1:
+        return 1, mutated[1], ""
+    for position, (before, after) in enumerate(zip(original, mutated)):
+        if before != after:
+            return position, after, before
+    return None
+
+class ModuleSkeleton:
+    # One module rendered once per revision and route plan, stored as literal
+    # segments interleaved with slots.
+    def __init__(self, transformer: ChaosTransformer):
+        rendered = transformer.render()
+        self.is_package = transformer.module.is_package
+        self.path_slots = transformer.path_slots
+        self.func_slots = transformer.func_slots
+        self.segments: List[str] = []
+        self.slots: List[tuple] = []  # ("path" | "func", slot index), one per gap between segments
+
+        cursor = 0
+        for match in SLOT_PATTERN.finditer(rendered):
+            self.segments.append(rendered[cursor:match.start()])
+            if match.group(2) is not None:
+                self.slots.append(("path", int(match.group(2))))
+            else:
+                self.slots.append(("func", int(match.group(3))))
+            cursor = match.end()
+        self.segments.append(rendered[cursor:])
+
+    def render(self, route_map: Dict[str, str], hashes: Dict[str, str]) -> str:
+        parts = [self.segments[0]]
+        for (kind, index), segment in zip(self.slots, self.segments[1:]):
+            if kind == "path":
+                parts.append(repr(route_map[self.path_slots[index]]))
+            else:
+                name, original_path = self.func_slots[index]
+                parts.append(f"{name}_{hashes[original_path]}")
+            parts.append(segment)
+        return "".join(parts)
+
+# Rendered modules by (module, content hash, route plan). Only the modules whose
+# source or plan changed are unparsed again when the template is re-indexed.
+_module_skeletons: Dict[tuple, ModuleSkeleton] = {}
+
+class TemplateSkeleton:
+    # The whole template indexed once per revision. Routes are keyed by the full
+    # path they are served under. Routers mounted exactly once are flattened:
+    # their prefixes move into the route strings, so each route can be renamed
+    # on its own without touching its neighbours. A router mounted under several
+    # prefixes keeps them, and its routes are left as they are.
+    def __init__(self, package: TemplatePackage, exempt=frozenset({"/"})):
+        global _module_skeletons
+        started = time.perf_counter()
+        self.root = package.root
+        self.entry = package.entry
+        self.bundled = package.bundled
+        self.stable_routes: Dict[str, str] = {}
+        self.route_methods: Dict[str, List[str]] = {}
+        self.path_slots: List[str] = []
+
+        mounted = package.mount_prefixes()
+        flat = {key for key, prefixes in mounted.items() if prefixes is not None and len(prefixes) == 1}
+        skeletons: Dict[tuple, ModuleSkeleton] = {}
+        self.modules: Dict[str, ModuleSkeleton] = {}
+        for name, module in package.modules.items():
+            cleared, plan = [], []
+            for symbol, (kind, factory) in module.factories.items():
+                keyword = keyword_arg(factory, "prefix")
+                if kind == "router" and (name, symbol) in flat and keyword is not None:
+                    cleared.append(keyword)
+                    plan.append(("factory", symbol))
+            for position, (_, router, call) in enumerate(module.mounts):
+                keyword = keyword_arg(call, "prefix")
+                if package.resolve(name, router) in flat and keyword is not None:
+                    cleared.append(keyword)
+                    plan.append(("mount", position))
+
+            entries, unresolved = [], 0
+            for position, decl in enumerate(module.routes):
+                owner = package.resolve(name, decl.owner)
+                if owner is None:
+                    continue
+                prefixes = mounted.get(owner)
+                if prefixes is None:
+                    unresolved += 1
+                    continue
+                for prefix in prefixes:
+                    path = prefix + decl.path_node.value
+                    methods = self.route_methods.setdefault(path, [])
+                    methods.extend(method for method in decl.methods if method not in methods)
+                    if owner not in flat or path in exempt:
+                        self.stable_routes[path] = path
+                if owner in flat:
+                    action = "fixed" if path in exempt else "slot"
+                    if action == "slot" and path not in self.path_slots:
+                        self.path_slots.append(path)
+                    entries.append((decl, action, path))
+                    plan.append((position, action, path))
+            if unresolved:
+                print(f"[MUTATOR][WARN] {unresolved} route(s) in {name or package.root} sit on a router "
+                      f"mounted under a non-literal prefix; they are not mutated or forwarded.")
+
+            key = (name, package.digests[name], tuple(plan))
+            skeleton = _module_skeletons.get(key)
+            if skeleton is None:
+                # Unparsing is timed as its own stage; keep it out of this one.
+                note_stage("mutation.resolve", started)
+                skeleton = ModuleSkeleton(ChaosTransformer(module, entries, cleared))
+                started = time.perf_counter()
+            skeletons[key] = skeleton
+            self.modules[name] = skeleton
+        _module_skeletons = skeletons
+        note_stage("mutation.resolve", started)
+
+    def render(self, hashes: Dict[str, str]):
+        # Fills every slot from a per-route hash table. Cost scales with the
+        # number of routes, not with parsing the template again.
+        route_map = dict(self.stable_routes)
+        for original_path in self.path_slots:
+            route_map[original_path] = mutate_path(original_path, hashes[original_path])
+
+        sources = {name: module.render(route_map, hashes) for name, module in self.modules.items()}
+        if not self.bundled:
+            return sources[self.entry], route_map
+        modules = {name: (self.modules[name].is_package, source) for name, source in sources.items()}
+        return render_bundle(self.root, self.entry, modules), route_map
 
-    def visit_FunctionDef(self, node):
-        # Only functions with route decorators are relevant to the mutation process.
-        if not node.decorator_list:
-            return node
+    def routes(self, route_map: Dict[str, str]) -> List[dict]:
+        # Method-aware route table the proxy compiles into its lookup index.
+        return [
+            {"methods": self.route_methods.get(path, []), "path": path, "target": target}
+            for path, target in route_map.items()
+        ]
 
-        for decorator in node.decorator_list:
-            # Detect typical FastAPI method decorators such as @app.get/post/etc.
-            if isinstance(decorator, ast.Call) and hasattr(decorator.func, 'attr'):
-                if decorator.func.attr in ['get', 'post', 'put', 'delete']:
-                    if decorator.args and hasattr(decorator.args[0], 'value'):
-                        original_path = decorator.args[0].value
+# Cached policy plus the stat signature it was read from.
+_policy_cache: Dict[str, object] = {"stat": None, "policy": DEFAULT_POLICY}
 
-                        # Keep the root endpoint stable for health checks and system probes.
-                        if original_path == "/":
-                            self.route_map[original_path] = original_path
-                            return node
+def load_mutation_policy(path: str = POLICY_PATH) -> Dict:
+    # Re-reads the sidecar only when it changed on disk. A missing file means the
+    # defaults; a broken one keeps the last good policy.
+    try:
+        st = os.stat(path)
+    except OSError:
+        return DEFAULT_POLICY
+    signature = (st.st_mtime_ns, st.st_size)
+    if _policy_cache["stat"] != signature:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                policy = json.load(f)
+            _policy_cache["policy"] = {
+                "default": {**DEFAULT_POLICY["default"], **policy.get("default", {})},
+                "routes": policy.get("routes", {}),
+            }
+        except (OSError, ValueError) as e:
+            print(f"[MUTATOR][ERROR] Ignoring unreadable mutation policy {path}: {e}")
+        _policy_cache["stat"] = signature
+    return _policy_cache["policy"]
+
+def route_policy(policy: Dict, original_path: str) -> Dict:
+    # Effective settings for one route: its own entry over the defaults.
+    return {**policy["default"], **policy["routes"].get(original_path, {})}
+
+def exempt_routes(policy: Dict) -> frozenset:
+    return frozenset(path for path, settings in policy["routes"].items() if settings.get("exempt"))
 
-                        # Construct a mutated route and rename the associated function.
-                        mutation_hash = generate_chaos_string()
-                        new_path = f"{original_path}_{mutation_hash}"
-                        new_func_name = f"{node.name}_{mutation_hash}"
+# Cached skeleton plus the module hashes and exemptions it was built from.
+_skeleton_cache: Dict[str, object] = {"signature": None, "skeleton": None}
 
-                        self.route_map[original_path] = new_path
+def load_template_skeleton(path: str = TEMPLATE_PATH) -> TemplateSkeleton:
+    # Re-indexes the template only when a module's content (or the set of
+    # exempt routes) actually changed. Each module is parsed and cached on its
+    # own, so an edit to one router module re-parses that file alone.
+    exempt = exempt_routes(load_mutation_policy())
+    package = load_template_package(path)
+    signature = (path, tuple(sorted(package.digests.items())), exempt)
+    if _skeleton_cache["signature"] != signature or _skeleton_cache["skeleton"] is None:
+        _skeleton_cache["skeleton"] = TemplateSkeleton(package, exempt)
+        _skeleton_cache["signature"] = signature
+    return _skeleton_cache["skeleton"]
 
-                        decorator.args[0].value = new_path
-                        node.name = new_func_name
+def route_intervals(default_interval: float) -> Dict[str, float]:
+    # Rotation interval per mutable route, for the proxy's scheduler.
+    policy = load_mutation_policy()
+    return {
+        path: float(route_policy(policy, path).get("interval", default_interval))
+        for path in load_template_skeleton().path_slots
+    }
 
-        return node
+def route_body_limits() -> Dict[str, int]:
+    # Request-body caps in bytes for the routes whose policy sets max_body.
+    policy = load_mutation_policy()
+    return {path: int(settings["max_body"]) for path, settings in policy["routes"].items() if "max_body" in settings}
+
+def _current_hash(original_path: str, target: str) -> Optional[str]:
+    # The hash a route currently carries, recovered from its mutated path.
+    renamed = mutated_segment(original_path, target)
+    if renamed is None:
+        return None
+    _, segment, base = renamed
+    return segment[len(base) + 1:] if base else segment[1:]
 
 def _atomic_write(path: str, content: str, mode: str = "w", encoding: str = "utf-8"):
     # Ensures safe, atomic writes so partially written files never appear,
@@ -67,28 +317,84 @@ def _atomic_write(path: str, content: str, mode: str = "w", encoding: str = "utf
         f.write(content)
     os.replace(tmp, path)  # POSIX atomic file replacement
 
-def run_mutation():
+def compile_route_index(route_map: Dict[str, str]) -> RouteIndex:
+    # Rebuilds the method-aware index for a mapping restored from disk, taking
+    # methods from the (cached) template. Unknown paths accept any method.
+    try:
+        return RouteIndex.from_routes(load_template_skeleton().routes(route_map))
+    except OSError:
+        return RouteIndex.from_mapping(route_map)
+
+def prepare_mutation(previous: Optional[Dict[str, str]] = None, due: Optional[List[str]] = None,
+                     default_interval: Optional[float] = None) -> Dict:
+    # Pure computation half of a mutation cycle: builds the next mutated source
+    # and route map without touching any output files. The proxy runs this in a
+    # worker process ahead of time so the event loop never pays for the AST work.
+    # Given the currently installed route map and the routes that are due, only
+    # those routes get a new hash; every other route keeps its mutated path, so
+    # the result is a small patch on top of `previous`. All state comes in
+    # through the arguments, so the worker process keeps none between calls.
+    # Given the default rotation interval, the per-route intervals and body
+    # limits ride along too, so the proxy never parses the template itself.
+    started = time.perf_counter()
+
     # Load the base template; without this the system cannot continue.
     if not os.path.exists(TEMPLATE_PATH):
         print(f"[MUTATOR][ERROR] Template not found at {TEMPLATE_PATH}")
         return {}
 
-    with open(TEMPLATE_PATH, "r", encoding="utf-8") as src:
-        tree = ast.parse(src.read())
+    # Reuse the indexed template and draw a fresh hash for every due route
+    # (or every route, for a full generation), sized by its policy.
+    skeleton = load_template_skeleton()
+    mark = time.perf_counter()
+    policy = load_mutation_policy()
+    previous = previous or {}
+    due_routes = set(skeleton.path_slots if due is None else due)
+    hashes = {}
+    for path in skeleton.path_slots:
+        kept = _current_hash(path, previous[path]) if path in previous and path not in due_routes else None
+        hashes[path] = kept or generate_chaos_string(int(route_policy(policy, path)["hash_length"]))
+    mark = note_stage("mutation.hashes", mark)
+    mutated_source, route_map = skeleton.render(hashes)
+    routes = skeleton.routes(route_map)
+    mark = note_stage("mutation.render", mark)
+    route_index = RouteIndex.from_routes(routes)
+    note_stage("mutation.route_index", mark)
 
-    # Apply the mutation logic and produce the updated AST.
-    transformer = ChaosTransformer()
-    new_tree = transformer.visit(tree)
-    ast.fix_missing_locations(new_tree)
-    mutated_source = ast.unparse(new_tree)
+    prepared = {
+        "route_map": route_map,
+        "changed": {path: target for path, target in route_map.items() if previous.get(path) != target},
+        "routes": routes,
+        "route_index": route_index,
+        "source": mutated_source,
+        "duration": time.perf_counter() - started,
+        # Per-stage durations (ms), recorded by the proxy; this runs in the
+        # worker process, which has no histograms of its own.
+        "stages": drain_stages(),
+    }
+    if default_interval is not None:
+        prepared["intervals"] = route_intervals(default_interval)
+        try:
+            prepared["body_limits"] = route_body_limits()
+        except (ValueError, TypeError) as e:
+            # Left out, the proxy re-reads the policy and reports the error.
+            print(f"[MUTATOR][ERROR] Ignoring invalid body limits: {e}")
+    return prepared
+
+def publish_mutation(prepared: Dict) -> Dict[str, str]:
+    # Writes a prepared mutation to disk so backend nodes and tooling see it.
+    if not prepared:
+        return {}
+    mutated_source = prepared["source"]
+    mark = time.perf_counter()
 
     # Write a local copy to the project folder for developers running the system manually.
     try:
-        with open(PROJECT_OUTPUT_PATH, "w", encoding="utf-8") as dst:
-            dst.write(mutated_source)
+        _atomic_write(PROJECT_OUTPUT_PATH, mutated_source)
         print(f"[MUTATOR] Wrote local project output -> {PROJECT_OUTPUT_PATH}")
     except Exception as e:
         print(f"[MUTATOR] Skipped local write: {e}")
+    mark = note_stage("publish.project", mark)
 
     # The main runtime output lives in /tmp, which is always writable in cloud environments.
     try:
@@ -97,17 +403,41 @@ def run_mutation():
     except Exception as e:
         print(f"[MUTATOR][ERROR] Failed to write runtime output: {e}")
         print(traceback.format_exc())
+    mark = note_stage("publish.runtime", mark)
 
     # Persist the route mapping so the proxy can correctly forward incoming requests.
     try:
-        json_text = json.dumps(transformer.route_map, indent=4)
+        json_text = json.dumps(prepared["route_map"], indent=4)
         _atomic_write(STATE_PATH, json_text)
         print(f"[MUTATOR] State saved -> {STATE_PATH}")
     except Exception as e:
         print(f"[MUTATOR][ERROR] Failed writing state: {e}")
         print(traceback.format_exc())
+    note_stage("publish.state", mark)
+
+    return prepared["route_map"]
+
+def load_published() -> Dict:
+    # Reads the last disk snapshot back, for startup only: the route map plus the
+    # source the nodes were started from (None when it is missing). Returns {}
+    # when there is no usable snapshot.
+    try:
+        with open(STATE_PATH, "r", encoding="utf-8") as f:
+            route_map = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(route_map, dict) or not route_map:
+        return {}
+    try:
+        with open(RUNTIME_OUTPUT_PATH, "r", encoding="utf-8") as f:
+            source = f.read()
+    except OSError:
+        source = None
+    return {"route_map": route_map, "source": source}
 
-    return transformer.route_map
+def run_mutation():
+    # One-shot mutation cycle used at boot and from the command line.
+    return publish_mutation(prepare_mutation())
 
 if __name__ == "__main__":
     print(run_mutation())
@@ -0,0 +1,140 @@
+# core/nodes.py
+# Backend node pool for the proxy. Any number of nodes can be configured; each
+# one is probed in the background and remembers which generation it was last
+# warmed against. A generation is served by a cohort of nodes, and requests are
+# spread round-robin over the members that are healthy and still on that
+# generation. Rotations alternate between cohorts: whichever healthy nodes are
+# not serving the current generation are drained, reloaded and warmed, then
+# take over, while the outgoing cohort drains and becomes the next standby.
+
+import itertools
+from typing import Dict, List, Optional
+
+GREEK_NAMES = ["ALPHA", "BETA", "GAMMA", "DELTA", "EPSILON", "ZETA", "ETA", "THETA"]
+
+def parse_nodes(spec: str) -> List[Dict[str, str]]:
+    # "ALPHA=http://127.0.0.1:8001,http://127.0.0.1:8002" -> node dicts. Nodes
+    # given as a bare URL are named after their position.
+    nodes = []
+    for position, entry in enumerate(part.strip() for part in spec.split(",") if part.strip()):
+        name, sep, url = entry.partition("=")
+        if not sep:
+            name, url = (GREEK_NAMES[position] if position < len(GREEK_NAMES) else f"NODE{position + 1}"), entry
+        nodes.append({"name": name.strip(), "url": url.strip().rstrip("/")})
+    if not nodes:
+        raise ValueError("at least one backend node is required")
+    if len({node["name"] for node in nodes}) != len(nodes):
+        raise ValueError("backend node names must be unique")
+    return nodes
+
+class NodeState:
+    __slots__ = ("healthy", "failures", "boot", "generation", "inflight", "latency_ms")
+
+    def __init__(self):
+        self.healthy = True         # optimistic until the first probe says otherwise
+        self.failures = 0
+        self.boot: Optional[str] = None
+        self.generation: Optional[int] = None
+        self.inflight = 0
+        self.latency_ms = 0.0
+
+class NodePool:
+    def __init__(self, nodes: List[Dict[str, str]], fail_threshold: int = 2):
+        self.nodes = nodes
+        self.fail_threshold = fail_threshold
+        self.state: Dict[str, NodeState] = {node["name"]: NodeState() for node in nodes}
+        self._cursor = itertools.count()
+
+    def by_name(self, name: str) -> Optional[Dict[str, str]]:
+        return next((node for node in self.nodes if node["name"] == name), None)
+
+    def healthy(self, node: Dict[str, str]) -> bool:
+        return self.state[node["name"]].healthy
+
+    def record_probe(self, node: Dict[str, str], ok: bool, boot: Optional[str] = None,
+                     latency_ms: float = 0.0) -> Optional[str]:
+        # Updates health from one probe and returns "up" / "down" on a state
+        # change. A node that restarted (new boot id) lost whatever generation it
+        # was warmed against, so it stops serving until the next rotation.
+        state = self.state[node["name"]]
+        if not ok:
+            state.failures += 1
+            if state.healthy and state.failures >= self.fail_threshold:
+                state.healthy = False
+                return "down"
+            return None
+        state.failures = 0
+        state.latency_ms = latency_ms
+        if boot is not None:
+            if state.boot is not None and boot != state.boot:
+                state.generation = None
+            state.boot = boot
+        if not state.healthy:
+            state.healthy = True
+            return "up"
+        return None
+
+    def mark_failed(self, node: Dict[str, str]):
+        # Reload or warm-up failed: take the node out until probes recover it.
+        state = self.state[node["name"]]
+        state.healthy = False
+        state.failures = max(state.failures, self.fail_threshold)
+        state.generation = None
+
+    def assign(self, nodes: List[Dict[str, str]], generation_id: Optional[int]):
+        for node in nodes:
+            self.state[node["name"]].generation = generation_id
+
+    def serving(self, nodes, generation_id: int) -> List[Dict[str, str]]:
+        # Members of a cohort that can take traffic for this generation.
+        return [
+            node for node in nodes
+            if self.state[node["name"]].healthy and self.state[node["name"]].generation == generation_id
+        ]
+
+    def pick(self, generation) -> Dict[str, str]:
+        # Round-robin over the generation's serving nodes. With none available
+        # the first cohort member is still tried so the client gets a 503 from
+        # the forwarding path rather than a misleading honeypot response.
+        candidates = self.serving(generation.nodes, generation.id)
+        if not candidates:
+            return generation.nodes[0]
+        return candidates[next(self._cursor) % len(candidates)]
+
+    def standby(self, current) -> List[Dict[str, str]]:
+        # Healthy nodes not serving the current generation form the incoming
+        # cohort. When every healthy node is on it (first boot, or after
+        # recoveries) the cohort is split and the second half is taken out.
+        healthy = [node for node in self.nodes if self.state[node["name"]].healthy]
+        if current is None:
+            return healthy
+        serving = self.serving(current.nodes, current.id)
+        incoming = [node for node in healthy if node not in serving]
+        if incoming or len(serving) < 2:
+            return incoming or serving
+        leaving = serving[(len(serving) + 1) // 2:]
+        self.assign(leaving, None)
+        return leaving
+
+    def enter(self, node: Dict[str, str]):
+        self.state[node["name"]].inflight += 1
+
+    def leave(self, node: Dict[str, str]):
+        self.state[node["name"]].inflight -= 1
+
+    def inflight(self, node: Dict[str, str]) -> int:
+        return self.state[node["name"]].inflight
+
+    def stats(self, current=None) -> List[Dict]:
+        active = {node["name"] for node in self.serving(current.nodes, current.id)} if current is not None else set()
+        return [
+            {
+                **node,
+                "active": node["name"] in active,
+                "healthy": self.state[node["name"]].healthy,
+                "generation": self.state[node["name"]].generation,
+                "inflight": self.state[node["name"]].inflight,
+                "latency_ms": round(self.state[node["name"]].latency_ms, 3),
+            }
+            for node in self.nodes
+        ]
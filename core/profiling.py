@@ -0,0 +1,162 @@
+# core/profiling.py
+# Built-in instrumentation for pinning a latency regression to a stage without
+# redeploying.
+#
+# Stage timing: the gateway, the rotation path and the mutation pipeline mark
+# named stages. Each stage's duration lands in its own log-scale histogram, the
+# same Histogram the metrics use. Switched off, marking a stage is one
+# attribute check. Code running in the mutation worker process cannot reach
+# the proxy's histograms, so it notes its stages in a plain per-process dict
+# (note_stage / drain_stages) that travels back with the prepared mutation.
+#
+# Sampling profiler: opt-in, started at runtime. A daemon thread samples the
+# event loop thread's Python stack at a fixed rate and counts identical stacks.
+# The result is the "folded" format read by flamegraph.pl, speedscope and
+# similar tools. Nothing runs while it is stopped, and every run ends by itself
+# after a capped duration.
+
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+from metrics import Histogram  # type: ignore
+
+# Stage durations (ms) noted since the last drain, in this process.
+_pending_stages: Dict[str, float] = {}
+
+def note_stage(name: str, started: float) -> float:
+    # Adds the time since `started` to a pending stage and returns the new mark,
+    # so consecutive stages chain off one perf_counter() call each.
+    now = time.perf_counter()
+    _pending_stages[name] = _pending_stages.get(name, 0.0) + (now - started) * 1000
+    return now
+
+def drain_stages() -> Dict[str, float]:
+    stages = dict(_pending_stages)
+    _pending_stages.clear()
+    return stages
+
+class StageTimer:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.histograms: Dict[str, Histogram] = {}
+
+    def start(self) -> float:
+        return time.perf_counter() if self.enabled else 0.0
+
+    def lap(self, name: str, started: float) -> float:
+        # Records the time since `started` under `name` and returns the new
+        # mark. A mark taken while timing was off (0.0) records nothing.
+        if not self.enabled or not started:
+            return 0.0
+        now = time.perf_counter()
+        self.observe(name, (now - started) * 1000)
+        return now
+
+    def observe(self, name: str, value_ms: float):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(value_ms)
+
+    def record(self, stages: Dict[str, float]):
+        # Stages measured elsewhere (the mutation worker) and shipped back.
+        if self.enabled:
+            for name, value_ms in stages.items():
+                self.observe(name, value_ms)
+
+    def export(self) -> Dict:
+        # Raw histograms, for adding up the workers of a multi-worker proxy.
+        return {name: histogram.export() for name, histogram in self.histograms.items()}
+
+    def absorb(self, exported: Dict):
+        for name, histogram in exported.items():
+            self.histograms.setdefault(name, Histogram()).absorb(histogram)
+
+    def snapshot(self) -> Dict:
+        return {name: histogram.snapshot() for name, histogram in sorted(self.histograms.items())}
+
+class SamplingProfiler:
+    def __init__(self, max_seconds: float = 120.0, max_stacks: int = 20000, max_depth: int = 64):
+        self.max_seconds = max_seconds
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self.stacks: Dict[str, int] = {}
+        self.samples = 0
+        self.dropped = 0
+        self.hz = 0.0
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, target_thread: int, hz: float, seconds: float) -> bool:
+        # Starts a fresh run against one thread (the event loop's). Returns
+        # False when a run is already in progress.
+        if self.running:
+            return False
+        self.stacks = {}
+        self.samples = 0
+        self.dropped = 0
+        self.hz = max(1.0, min(hz, 1000.0))
+        self.started_at = time.time()
+        self.stopped_at = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(target_thread, 1.0 / self.hz, min(seconds, self.max_seconds)),
+            name="chameleon-profiler", daemon=True,
+        )
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def _run(self, target_thread: int, interval: float, seconds: float):
+        deadline = time.monotonic() + seconds
+        while not self._stop.wait(interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(target_thread)
+            if frame is None:
+                break
+            stack = self._fold(frame)
+            # Past max_stacks only already-seen stacks are counted, so memory
+            # stays bounded however varied the workload.
+            if stack in self.stacks or len(self.stacks) < self.max_stacks:
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            else:
+                self.dropped += 1
+            self.samples += 1
+        self.stopped_at = time.time()
+
+    def _fold(self, frame) -> str:
+        # Root-first "file:function" frames joined by ";".
+        frames = []
+        while frame is not None and len(frames) < self.max_depth:
+            code = frame.f_code
+            frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(frames))
+
+    def folded(self) -> str:
+        # One "stack count" line per distinct stack.
+        stacks = dict(self.stacks)
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "hz": self.hz,
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "dropped": self.dropped,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+        }
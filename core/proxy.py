@@ -6,154 +6,972 @@
 
 import uvicorn
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 import httpx
 import asyncio
 import secrets
-from colorama import Fore, Style, init
+from colorama import init
 import sys
 import os
 import json
+import time
 import traceback
-from typing import Dict
+import re
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
 
 # Adjust import path so this proxy can call into the mutation engine
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from mutator import run_mutation  # type: ignore
+from mutator import prepare_mutation, publish_mutation, load_published, compile_route_index, route_intervals, route_body_limits  # type: ignore
+from generations import Generation, GenerationTable  # type: ignore
+from reputation import CountMinSketch, ReputationStore  # type: ignore
+from tarpit import Tarpit  # type: ignore
+from events import EventLog  # type: ignore
+from metrics import Metrics  # type: ignore
+from nodes import NodePool, parse_nodes  # type: ignore
+from honeypot import HoneypotEngine  # type: ignore
+from guards import BodyLimitExceeded, BodyLimitGuard, ReputationShield  # type: ignore
+from replay import ReplayIndex  # type: ignore
+from schedule import RotationSchedule  # type: ignore
+from profiling import SamplingProfiler, StageTimer, drain_stages  # type: ignore
+from shared import SHARED_DIR, GenerationChannel, LeaderLock, MetricsBoard, SharedRegion, shared_float_rows  # type: ignore
 
 init(autoreset=True)
 app = FastAPI()
 
-# Backend node definitions—these correspond to the two Uvicorn instances
-# started in start.sh. Only one node is active at a time.
-NODES = [
-    {"name": "ALPHA", "url": "http://127.0.0.1:8001"},
-    {"name": "BETA",  "url": "http://127.0.0.1:8002"}
-]
+# Backend node definitions—these correspond to the Uvicorn instances started
+# in start.sh, given as "NAME=url" or bare URLs separated by commas. Nodes are
+# split into cohorts: one serves the current generation while the other drains
+# and is pre-warmed against the next one.
+NODES = parse_nodes(os.environ.get(
+    "CHAMELEON_NODES", "ALPHA=http://127.0.0.1:8001,BETA=http://127.0.0.1:8002"
+))
+
+# Background health probes. A node is taken out after HEALTH_FAILURES missed
+# probes in a row and comes back as standby once it answers again.
+HEALTH_PATH = "/_chameleon/health"
+HEALTH_INTERVAL = float(os.environ.get("CHAMELEON_HEALTH_INTERVAL", "2"))
+HEALTH_TIMEOUT = float(os.environ.get("CHAMELEON_HEALTH_TIMEOUT", "1"))
+HEALTH_FAILURES = int(os.environ.get("CHAMELEON_HEALTH_FAILURES", "2"))
+# How long before a rotation the incoming cohort is reloaded and warmed up, so
+# the switch itself never waits on a node.
+PREWARM_LEAD = float(os.environ.get("CHAMELEON_PREWARM_LEAD", "2"))
+# A patch that could not be installed is retried this much later, and the
+# warning about it repeats at most every SKIP_WARNING_INTERVAL seconds.
+ROTATION_RETRY = max(1.0, HEALTH_INTERVAL)
+SKIP_WARNING_INTERVAL = 30.0
+node_pool = NodePool(NODES, HEALTH_FAILURES)
+
+# Default rotation interval for routes whose mutation policy (see
+# target_app/mutation_policy.json) does not set one. Routes that fall due within
+# MUTATION_COALESCE seconds of each other are renamed in the same patch.
+MUTATION_INTERVAL = float(os.environ.get("CHAMELEON_MUTATION_INTERVAL", "25"))
+MUTATION_COALESCE = float(os.environ.get("CHAMELEON_MUTATION_COALESCE", "1"))
+rotation_schedule: RotationSchedule = None
+next_rotation_at = 0.0
+
+# Upstream connection pool sizing. Each node gets one long-lived client created
+# at startup so forwarded requests reuse warm keep-alive connections instead of
+# paying a TCP handshake per request.
+POOL_MAX_CONNECTIONS = int(os.environ.get("CHAMELEON_POOL_MAX_CONNECTIONS", "100"))
+POOL_MAX_KEEPALIVE = int(os.environ.get("CHAMELEON_POOL_MAX_KEEPALIVE", "20"))
+POOL_KEEPALIVE_EXPIRY = float(os.environ.get("CHAMELEON_POOL_KEEPALIVE_EXPIRY", "30"))
+UPSTREAM_TIMEOUT = float(os.environ.get("CHAMELEON_UPSTREAM_TIMEOUT", "5.0"))
+
+# Hop-by-hop headers only describe a single connection and must not be relayed
+# (RFC 7230 §6.1). Content-length is kept so streamed bodies keep their framing.
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade",
+}
+# uvicorn stamps its own date/server headers on every response it sends.
+PROXY_OWNED_RESPONSE_HEADERS = {"date", "server"}
+
+upstream_clients: Dict[str, httpx.AsyncClient] = {}
+
+# Mutation generation runs in a dedicated worker process so template parsing and
+# AST rewriting never stall requests on the proxy's event loop.
+mutation_executor: ProcessPoolExecutor = None
+# How long a replaced generation keeps routing (to its original node) after a
+# rotation, so in-flight and just-issued requests drain instead of failing.
+GRACE_WINDOW = float(os.environ.get("CHAMELEON_GRACE_WINDOW", "5"))
 
-MUTATION_INTERVAL = 25
-current_node_index = 0
 current_mapping: Dict[str, str] = {}
-ip_reputation: Dict[str, int] = {}
-STATE_PATH = "/tmp/mutation_state.json"
-
-# Payload returned to attackers when they probe stale or invalid endpoints.
-FAKE_DB = {
-    "status": "CRITICAL_SUCCESS",
-    "user_data": {
-        "username": "admin_root",
-        "permissions": "UNLIMITED",
-        "account_flag": "TRAP_DOOR_ACTIVATED_IP_LOGGED"
-    },
-    "system_message": "Root access granted. Downloading database..."
+generations = GenerationTable(GRACE_WINDOW)
+# Renamed segments of the last CHAMELEON_REPLAY_DEPTH generations, used to tell
+# replays of paths we really served apart from near-misses and plain noise.
+replay_index = ReplayIndex(int(os.environ.get("CHAMELEON_REPLAY_DEPTH", "16")))
+# Suspicion scores per client IP: a fixed number of LRU slots with decaying
+# scores, optionally backed by a count-min sketch for IPs that fall out of the
+# table (a width of 0 disables the sketch).
+REPUTATION_CAPACITY = int(os.environ.get("CHAMELEON_REPUTATION_CAPACITY", "100000"))
+REPUTATION_HALF_LIFE = float(os.environ.get("CHAMELEON_REPUTATION_HALF_LIFE", "300"))
+REPUTATION_SKETCH_WIDTH = int(os.environ.get("CHAMELEON_REPUTATION_SKETCH_WIDTH", "0"))
+ip_reputation = ReputationStore(REPUTATION_CAPACITY, REPUTATION_HALF_LIFE, REPUTATION_SKETCH_WIDTH)
+# Generations reach the nodes in the body of their reload call. Writing them to
+# disk is only a background snapshot for restarts and tooling.
+PERSIST_SNAPSHOTS = os.environ.get("CHAMELEON_PERSIST_SNAPSHOTS", "1") != "0"
+BOOT_SYNC_TIMEOUT = float(os.environ.get("CHAMELEON_BOOT_SYNC_TIMEOUT", "30"))
+# Shared secret the nodes require before accepting pushed source (start.sh
+# generates one per run). Clients may never supply it: the header is stripped
+# from everything the gateway forwards.
+CONTROL_TOKEN = os.environ.get("CHAMELEON_CONTROL_TOKEN", "")
+CONTROL_TOKEN_HEADER = "x-chameleon-token"
+# Nodes that answered a push with 403; reported once until they accept again.
+token_refusals: set = set()
+_snapshot_task: Optional[asyncio.Task] = None
+
+# Multi-worker mode. With more than one uvicorn worker, a file lock elects the
+# single worker that owns mutation and rotation; it publishes every generation
+# into shared memory, and the other workers adopt it by watching a version
+# counter. Reputation scores are pooled through a shared count-min sketch, and
+# every worker posts its telemetry to a shared board so a metrics snapshot
+# covers all of them whichever worker serves it.
+PROXY_WORKERS = int(os.environ.get("CHAMELEON_PROXY_WORKERS", "1"))
+SHARED_STATE = PROXY_WORKERS > 1
+GENERATION_CHANNEL_PATH = os.path.join(SHARED_DIR, "chameleon_generation")
+REPUTATION_SHARED_PATH = os.path.join(SHARED_DIR, "chameleon_reputation")
+METRICS_BOARD_PATH = os.path.join(SHARED_DIR, "chameleon_metrics")
+REPUTATION_SHARED_WIDTH = int(os.environ.get("CHAMELEON_REPUTATION_SHARED_WIDTH", str(1 << 18)))
+LEADER_LOCK_PATH = os.environ.get("CHAMELEON_LEADER_LOCK", "/tmp/chameleon_leader.lock")
+SHARED_POLL_INTERVAL = 0.05
+LEADER_RETRY_INTERVAL = 1.0
+generation_channel: GenerationChannel = None
+metrics_board: Optional[MetricsBoard] = None
+leader_lock = LeaderLock(LEADER_LOCK_PATH)
+
+# Tarpit limits: how many held clients the proxy tolerates overall and per IP,
+# and how slowly honeypot bodies are drip-fed.
+tarpit = Tarpit(
+    max_total=int(os.environ.get("CHAMELEON_TARPIT_MAX", "1000")),
+    max_per_ip=int(os.environ.get("CHAMELEON_TARPIT_PER_IP", "4")),
+    drip_bytes=int(os.environ.get("CHAMELEON_TARPIT_DRIP_BYTES", "24")),
+    drip_interval=float(os.environ.get("CHAMELEON_TARPIT_DRIP_INTERVAL", "0.05")),
+)
+
+# Payloads returned to attackers when they probe stale or invalid endpoints:
+# a pre-rendered pool of fakes, varied per attacker IP and path. Workers need
+# the same key to answer a given attacker identically; the multi-worker
+# launcher below generates one when none is configured.
+honeypot = HoneypotEngine(
+    key=bytes.fromhex(os.environ["CHAMELEON_HONEYPOT_KEY"]) if os.environ.get("CHAMELEON_HONEYPOT_KEY") else None,
+    pool_size=int(os.environ.get("CHAMELEON_HONEYPOT_VARIANTS", "64")),
+    cache_size=int(os.environ.get("CHAMELEON_HONEYPOT_CACHE", "10000")),
+)
+
+# Structured event pipeline. Handlers enqueue events; a background writer
+# batches them to JSON lines and (optionally) to the colored console.
+events = EventLog(
+    path=os.environ.get("CHAMELEON_EVENT_LOG", "/tmp/chameleon_events.jsonl"),
+    capacity=int(os.environ.get("CHAMELEON_EVENT_BUFFER", "8192")),
+    forward_sample=int(os.environ.get("CHAMELEON_FORWARD_SAMPLE", "10")),
+    console=os.environ.get("CHAMELEON_EVENT_CONSOLE", "1") != "0",
+)
+
+# Live counters and latency histograms. The dashboard reads them through one
+# cached snapshot instead of polling files or deriving state from the clock.
+metrics = Metrics()
+METRICS_PATH = "/_chameleon/metrics"
+METRICS_CACHE_TTL = float(os.environ.get("CHAMELEON_METRICS_TTL", "0.5"))
+LOOPBACK_HOSTS = {"127.0.0.1", "::1", "localhost"}
+# Per-worker activity counts added up in the snapshot, and how long a worker's
+# last post still counts towards its live gauges.
+SUMMED_STATS = {
+    "tarpit": ("occupancy", "admitted", "shed", "pending_timers"),
+    "honeypot": ("hits", "misses"),
+    "events": ("buffered", "emitted", "written", "dropped", "sampled_out"),
 }
+WORKER_STALE_AFTER = 5.0
+CONTROL_PREFIX = "/_chameleon/"
+_metrics_cache = {"built_at": 0.0, "body": b""}
 
-def print_log(source: str, message: str, color: Fore = Fore.WHITE):
-    # Standardized colored logging for clear visibility during runtime.
-    print(f"{color}[{source}] {message}{Style.RESET_ALL}")
+# Per-stage latency histograms (gateway, rotation and mutation stages) and an
+# opt-in sampling profiler of the event loop thread. Both are switched at
+# runtime through the loopback-only profile endpoint; CHAMELEON_PROFILE_STAGES=0
+# starts with stage timing off.
+PROFILE_PATH = "/_chameleon/profile"
+PROFILE_HZ = float(os.environ.get("CHAMELEON_PROFILE_HZ", "100"))
+PROFILE_SECONDS = float(os.environ.get("CHAMELEON_PROFILE_SECONDS", "30"))
+stage_timer = StageTimer(enabled=os.environ.get("CHAMELEON_PROFILE_STAGES", "1") != "0")
+sampler = SamplingProfiler(max_seconds=float(os.environ.get("CHAMELEON_PROFILE_MAX_SECONDS", "300")))
 
-def load_state_from_tmp() -> Dict[str, str]:
-    # Attempts to restore the most recent route mapping from /tmp.
-    # This allows the proxy to survive noisy boot conditions or node restarts.
-    try:
-        if os.path.exists(STATE_PATH):
-            with open(STATE_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if isinstance(data, dict):
-                return data
-    except Exception as e:
-        print_log("PROXY", f"Failed reading /tmp state: {e}", Fore.YELLOW)
-    return {}
+# Request bodies are capped before anything reads them: CHAMELEON_MAX_BODY for
+# every path, overridden per route by max_body in the mutation policy (keyed by
+# the public route). Oversized declared bodies get a 413 before routing;
+# streamed ones are cut off as they cross the limit.
+MAX_BODY = int(os.environ.get("CHAMELEON_MAX_BODY", str(1 << 20)))
+body_limits: Dict[str, int] = {}
+
+def body_limit(method: str, path: str) -> int:
+    current = generations.current
+    if body_limits and current is not None:
+        route = current.index.route(method, path)
+        if route in body_limits:
+            return body_limits[route]
+    return MAX_BODY
+
+app.add_middleware(
+    BodyLimitGuard,
+    limit_for=body_limit,
+    on_reject=lambda how: metrics.incr(f"body_rejected_{how}"),
+)
+
+def _loopback_control(scope) -> bool:
+    # The dashboard polls /_chameleon/* from loopback, which also hosts the
+    # local test tools that trip honeypots; the shield must not blind it.
+    client = scope.get("client")
+    return scope["path"].startswith(CONTROL_PREFIX) and (client[0] if client else "") in LOOPBACK_HOSTS
+
+# Repeat offenders are handled by a raw ASGI guard before FastAPI routing runs.
+# Clients between the tarpit score (0.5) and this threshold still go through
+# the gateway's own delay; "off" disables the guard.
+SHIELD_POLICY = os.environ.get("CHAMELEON_SHIELD_POLICY", "tarpit")
+SHIELD_THRESHOLD = float(os.environ.get("CHAMELEON_SHIELD_THRESHOLD", "5"))
+if SHIELD_POLICY != "off":
+    app.add_middleware(
+        ReputationShield,
+        score=lambda ip: ip_reputation.score(ip),
+        threshold=SHIELD_THRESHOLD,
+        policy=SHIELD_POLICY,
+        tarpit=tarpit,
+        decoy=honeypot.render,
+        hold=float(os.environ.get("CHAMELEON_SHIELD_HOLD", "1")),
+        rate=float(os.environ.get("CHAMELEON_SHIELD_RATE", "1")),
+        burst=float(os.environ.get("CHAMELEON_SHIELD_BURST", "5")),
+        on_block=lambda action: metrics.incr(f"shield_{action}"),
+        exempt=_loopback_control,
+    )
+
+def persist_snapshot(prepared: Dict):
+    # Writes a generation to disk off the critical path. Snapshots are chained
+    # so an older one can never land after a newer one.
+    global _snapshot_task
+    if not PERSIST_SNAPSHOTS:
+        return
+    previous = _snapshot_task
+
+    async def write():
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        try:
+            await asyncio.to_thread(publish_mutation, prepared)
+            stage_timer.record(drain_stages())
+        except Exception as e:
+            events.emit("warning", message=f"Snapshot write failed: {e}")
+
+    _snapshot_task = asyncio.create_task(write())
+
+def nodes_by_name(names: List[str]) -> List[Dict[str, str]]:
+    return [node for node in (node_pool.by_name(name) for name in names) if node is not None] or NODES[:1]
+
+def install_generation(generation: Generation, limits: Optional[Dict[str, int]] = None):
+    # Makes a generation current and routes it to the cohort warmed against it.
+    # Per-route body limits follow policy edits from one generation to the next;
+    # rotations bring them from the mutation worker, boot reads the policy.
+    global body_limits
+    if limits is not None:
+        body_limits = limits
+    else:
+        try:
+            body_limits = route_body_limits()
+        except (OSError, ValueError, TypeError) as e:
+            events.emit("warning", message=f"Keeping the previous body limits: {e}")
+    node_pool.assign(generation.nodes, generation.id)
+    generations.publish(generation)
+    replay_index.add_generation(generation.id, generation.mapping)
+
+def share_generation(generation: Generation):
+    # Leader only: makes a generation visible to every other worker.
+    if generation_channel is not None:
+        generation_channel.publish({
+            "generation": generation.id,
+            "nodes": [node["name"] for node in generation.nodes],
+            "mapping": generation.mapping,
+            "rotated_at": metrics.last_rotation_at,
+            "next_rotation_at": next_rotation_at,
+            "body_limits": body_limits,
+        })
+
+async def adopt_shared_generation(payload: Dict):
+    # Follower only: installs the leader's generation locally. The retired one
+    # keeps its grace window here exactly as it does in the leader.
+    global current_mapping, next_rotation_at
+    index = await asyncio.to_thread(compile_route_index, payload["mapping"])
+    install_generation(Generation(payload["generation"], payload["mapping"], index, nodes_by_name(payload["nodes"])),
+                       payload.get("body_limits"))
+    current_mapping = payload["mapping"]
+    metrics.last_rotation_at = payload.get("rotated_at", time.time())
+    next_rotation_at = payload.get("next_rotation_at", 0.0)
+    asyncio.get_running_loop().call_later(GRACE_WINDOW, generations.expire)
+
+def open_shared_state():
+    # Maps the shared regions into this worker and swaps in a reputation store
+    # backed by the shared sketch.
+    global generation_channel, ip_reputation
+    generation_channel = GenerationChannel(GENERATION_CHANNEL_PATH)
+    region = SharedRegion(REPUTATION_SHARED_PATH, 4 * 4 * REPUTATION_SHARED_WIDTH)
+    sketch = CountMinSketch(REPUTATION_SHARED_WIDTH, 4, rows=shared_float_rows(region, 4, REPUTATION_SHARED_WIDTH))
+    ip_reputation = ReputationStore(REPUTATION_CAPACITY, REPUTATION_HALF_LIFE, shared_sketch=sketch)
+    open_metrics_board()
+
+def open_metrics_board():
+    # Claims this worker's slot on the metrics board. A worker replacing one
+    # that died carries on from its counters, so the totals never go backwards.
+    global metrics_board
+    board = MetricsBoard(METRICS_BOARD_PATH, 2 * PROXY_WORKERS)
+    slot = board.claim()
+    if slot is None:
+        events.emit("warning", message=f"Worker {os.getpid()} found no free metrics slot; its telemetry is local only.")
+        return
+    previous = board.read(slot)
+    if previous is not None and previous.get("pid") != os.getpid():
+        metrics.absorb(previous["metrics"])
+        stage_timer.absorb(previous["stages"])
+    metrics_board = board
+    asyncio.create_task(publish_worker_metrics())
+
+async def publish_worker_metrics():
+    while True:
+        try:
+            metrics_board.publish(worker_metrics())
+        except ValueError as e:
+            events.emit("warning", message=f"Worker {os.getpid()} telemetry not shared: {e}")
+        await asyncio.sleep(METRICS_CACHE_TTL)
 
 @app.on_event("startup")
 async def start_engine():
-    # Boot sequence: attempt to load existing state, and fall back to generating
-    # one if the system is starting fresh or the previous state was missing.
+    # Boot sequence: in multi-worker mode only the elected leader restores or
+    # generates state; followers adopt whatever the leader has published.
+    events.start()
+    events.emit("system", message="Booting CHAMELEON Engine...")
+    if not CONTROL_TOKEN:
+        events.emit("warning", message="CHAMELEON_CONTROL_TOKEN is not set; nodes will refuse every generation push.")
+    open_upstream_pools()
+    asyncio.create_task(health_loop())
+
+    if SHARED_STATE:
+        open_shared_state()
+        if not leader_lock.try_acquire():
+            shared = generation_channel.read()
+            if shared is not None:
+                await adopt_shared_generation(shared[1])
+            else:
+                restore_generation()
+            asyncio.create_task(follow_generations(shared[0] if shared else 0))
+            events.emit("system", message=f"Worker {os.getpid()} following the mutation leader.")
+            return
+
+    source = restore_generation()
+    asyncio.create_task(lead(source))
+
+def restore_generation() -> Optional[str]:
+    # Attempt to load existing state, and fall back to generating one if the
+    # system is starting fresh or the previous state was missing. Returns the
+    # generation's source when it is known, so the nodes can be synced to it.
     global current_mapping
-    print_log("SYSTEM", "Booting CHAMELEON Engine...", Fore.CYAN)
+    if SHARED_STATE:
+        shared = generation_channel.read()
+        if shared is not None:
+            # A new leader continues the previous leader's generation sequence.
+            payload = shared[1]
+            install_generation(Generation(
+                payload["generation"], payload["mapping"], compile_route_index(payload["mapping"]),
+                nodes_by_name(payload["nodes"]),
+            ))
+            current_mapping = payload["mapping"]
+            metrics.last_rotation_at = payload.get("rotated_at", time.time())
+            return None
 
-    current_mapping = load_state_from_tmp()
+    published = load_published()
+    current_mapping, source = published.get("route_map", {}), published.get("source")
+    index = compile_route_index(current_mapping)
     if not current_mapping:
         try:
-            current_mapping = run_mutation()
-            print_log("SYSTEM", "Generated initial mapping via mutator.", Fore.CYAN)
+            prepared = prepare_mutation()
+            stage_timer.record(prepared.get("stages", {}))
+            persist_snapshot(prepared)
+            current_mapping, index, source = prepared["route_map"], prepared["route_index"], prepared["source"]
+            events.emit("system", message="Generated initial mapping via mutator.")
         except Exception as e:
-            print_log("ERROR", f"Startup mutator failed: {e}", Fore.RED)
-            print(traceback.format_exc())
+            events.emit("error", message=f"Startup mutator failed: {e}", traceback=traceback.format_exc())
+    # Nodes that started from the same snapshot already serve it; the boot sync
+    # pushes it to any that did not.
+    install_generation(Generation(generations.next_id(), current_mapping, index, NODES))
+    metrics.last_rotation_at = time.time()
+    return source
+
+async def sync_boot_nodes(source: str):
+    # Pushes the boot generation to every node, retrying nodes that are still
+    # starting up until BOOT_SYNC_TIMEOUT passes.
+    deadline = time.monotonic() + BOOT_SYNC_TIMEOUT
+    pending = list(NODES)
+    while pending and time.monotonic() < deadline:
+        results = await asyncio.gather(*(reload_node(node, source, quiet=True) for node in pending),
+                                       return_exceptions=True)
+        # A node refusing the token will not change its mind on a retry.
+        pending = [node for node, synced in zip(pending, results) if synced is False]
+        if pending:
+            await asyncio.sleep(0.5)
+    for node in pending:
+        events.emit("warning", message=f"Node {node['name']} did not accept the boot generation.")
+
+async def lead(boot_source: Optional[str] = None):
+    # This worker owns mutation: it ages the shared reputation counters,
+    # republishes the current generation for followers and runs the rotation.
+    if ip_reputation.sketch is not None:
+        asyncio.create_task(age_reputation())
+    share_generation(generations.current)
+    if boot_source:
+        asyncio.create_task(sync_boot_nodes(boot_source))
+    if SHARED_STATE:
+        events.emit("system", message=f"Worker {os.getpid()} elected mutation leader.")
+    await mutation_loop()
+
+async def age_reputation():
+    # One pass over the sketch per half-life, in a thread so the full sweep of
+    # the counters never holds up request handling.
+    while True:
+        await asyncio.sleep(REPUTATION_HALF_LIFE)
+        await asyncio.to_thread(ip_reputation.age_sketch)
+
+async def follow_generations(seen_version: int):
+    # Followers watch the shared version counter and adopt new generations.
+    # They also retry the leader lock so a crashed leader is replaced.
+    last_lock_attempt = time.monotonic()
+    while True:
+        await asyncio.sleep(SHARED_POLL_INTERVAL)
+        version = generation_channel.version()
+        if version != seen_version and not version & 1:
+            shared = generation_channel.read()
+            if shared is not None:
+                seen_version = shared[0]
+                await adopt_shared_generation(shared[1])
+        if time.monotonic() - last_lock_attempt >= LEADER_RETRY_INTERVAL:
+            last_lock_attempt = time.monotonic()
+            if leader_lock.try_acquire():
+                await lead()
+                return
+
+def open_upstream_pools():
+    # One pooled HTTP/1.1 client per backend node. Connections stay alive between
+    # requests and the pool caps how many sockets a single node can be handed.
+    limits = httpx.Limits(
+        max_connections=POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=POOL_MAX_KEEPALIVE,
+        keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+    )
+    for node in NODES:
+        transport = httpx.AsyncHTTPTransport(retries=3, limits=limits)
+        upstream_clients[node["name"]] = httpx.AsyncClient(
+            base_url=node["url"],
+            transport=transport,
+            timeout=UPSTREAM_TIMEOUT,
+        )
+
+@app.on_event("shutdown")
+async def flush_events():
+    await events.stop()
 
-    asyncio.create_task(mutation_loop())
+@app.on_event("shutdown")
+async def close_upstream_pools():
+    # Release pooled sockets so uvicorn can exit without leaking connections.
+    for client in upstream_clients.values():
+        await client.aclose()
+    upstream_clients.clear()
+
+def _forwardable_headers(headers, drop=()) -> list:
+    # Keep end-to-end headers (including duplicates such as set-cookie) as-is.
+    return [
+        (k, v) for k, v in headers.items()
+        if k.lower() not in HOP_BY_HOP_HEADERS and k.lower() not in drop
+    ]
+
+def _has_body(request: Request) -> bool:
+    # Only stream a request body when the client actually framed one; otherwise
+    # httpx would switch a plain GET to chunked transfer encoding.
+    return "content-length" in request.headers or "transfer-encoding" in request.headers
+
+class _UpstreamRelay:
+    # Streams an upstream body to the client and, exactly once, returns the
+    # connection to the pool and unpins the generation and node. Cleanup runs
+    # from the body iterator's finally (client disconnects mid-stream) and again
+    # as the response's background task (normal completion); the second call is
+    # a no-op.
+    def __init__(self, resp: httpx.Response, generation: Generation, node: Dict[str, str]):
+        self.resp = resp
+        self.generation = generation
+        self.node = node
+        self.finished = False
+        self.started = stage_timer.start()
+
+    async def body(self):
+        try:
+            async for chunk in self.resp.aiter_raw():
+                yield chunk
+        finally:
+            await self.finish()
+
+    async def finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        try:
+            await self.resp.aclose()
+        finally:
+            generations.release(self.generation)
+            node_pool.leave(self.node)
+            stage_timer.lap("gateway.relay", self.started)
+
+class ControlTokenRejected(Exception):
+    # A node refused a push with 403: the proxy and the node disagree on the
+    # control token. That is a deployment error, not a failing node, so the
+    # node is neither marked down nor retried.
+    pass
+
+async def reload_node(node: Dict[str, str], source: str, quiet: bool = False) -> bool:
+    # Hands a mutation's source to a backend node, which builds and hot-swaps
+    # the app from the request body without touching disk.
+    try:
+        resp = await upstream_clients[node["name"]].post(
+            "/_chameleon/reload", content=source.encode("utf-8"),
+            headers={"Content-Type": "text/x-python", "X-Chameleon-Token": CONTROL_TOKEN},
+        )
+    except Exception as e:
+        if not quiet:
+            events.emit("warning", message=f"Node {node['name']} reload failed: {e}")
+        return False
+    if resp.status_code == 403:
+        if node["name"] not in token_refusals:
+            token_refusals.add(node["name"])
+            metrics.incr("control_token_refusals")
+            events.emit("error", message=f"Node {node['name']} refused the control token; run it with the "
+                                         "proxy's CHAMELEON_CONTROL_TOKEN.")
+        raise ControlTokenRejected(node["name"])
+    token_refusals.discard(node["name"])
+    return resp.status_code == 200
+
+async def probe_node(node: Dict[str, str]):
+    started = time.perf_counter()
+    try:
+        resp = await upstream_clients[node["name"]].get(HEALTH_PATH, timeout=HEALTH_TIMEOUT)
+        health = resp.json() if resp.status_code == 200 else {}
+        ok, boot = bool(health.get("loaded")), health.get("boot")
+    except Exception:
+        ok, boot = False, None
+    change = node_pool.record_probe(node, ok, boot, (time.perf_counter() - started) * 1000)
+    if change is not None:
+        events.emit("node", node=node["name"], status=change)
+
+async def health_loop():
+    # Probes every node concurrently; each worker keeps its own view.
+    while True:
+        await asyncio.gather(*(probe_node(node) for node in NODES))
+        await asyncio.sleep(HEALTH_INTERVAL)
+
+def warmup_path(routes: List[dict]) -> Optional[str]:
+    # A mutated GET route to hit on a freshly reloaded node; the first request
+    # builds the app's middleware stack and proves the new routes are live.
+    # Path parameters are filled with a plausible value.
+    targets = [route["target"] for route in routes if "GET" in route["methods"] and route["target"] != route["path"]]
+    static = [target for target in targets if "{" not in target]
+    if static:
+        return static[0]
+    return re.sub(r"\{[^}]+\}", "1", targets[0]) if targets else None
+
+async def warm_node(node: Dict[str, str], source: str, path: Optional[str]) -> bool:
+    if not await reload_node(node, source):
+        return False
+    if path is None:
+        return True
+    try:
+        resp = await upstream_clients[node["name"]].get(path)
+        return resp.status_code != 404 and resp.status_code < 500
+    except Exception as e:
+        events.emit("warning", message=f"Node {node['name']} warm-up failed: {e}")
+        return False
+
+async def prewarm_cohort(prepared: Dict, tick: float) -> List[Dict[str, str]]:
+    # Drains the incoming cohort, then hands every member the prepared source
+    # and warms it. Members that fail are marked down and skipped;
+    # the returned nodes are ready to take traffic for the new generation.
+    # With a single healthy node the cohort is the node serving right now:
+    # reloading it ahead of the tick would drop the patched routes' current
+    # paths for the whole lead, so its reload waits for the tick and the
+    # generation is installed as soon as it is warm.
+    current = generations.current
+    serving = node_pool.serving(current.nodes, current.id) if current is not None else []
+    cohort = node_pool.standby(current)
+    if not cohort:
+        return []
+    if any(node in serving for node in cohort):
+        await asyncio.sleep(max(0.0, tick - asyncio.get_running_loop().time()))
+    mark = stage_timer.start()
+    await asyncio.gather(*(wait_for_drain(node) for node in cohort))
+    node_pool.assign([node for node in cohort if current is None or node not in current.nodes], None)
+    path = warmup_path(prepared["routes"])
+    results = await asyncio.gather(*(warm_node(node, prepared["source"], path) for node in cohort),
+                                   return_exceptions=True)
+    for node, warmed in zip(cohort, results):
+        if isinstance(warmed, ControlTokenRejected):
+            # The node still runs what it had; one taken off the current
+            # generation for this rotation goes back to serving it.
+            if node in serving:
+                node_pool.assign([node], current.id)
+        elif warmed is not True:
+            if node_pool.healthy(node):
+                events.emit("node", node=node["name"], status="down")
+            node_pool.mark_failed(node)
+    stage_timer.lap("rotation.prewarm", mark)
+    return [node for node, warmed in zip(cohort, results) if warmed is True]
+
+async def wait_for_drain(node: Dict[str, str]):
+    # A node still serving a retired generation inside its grace window (or
+    # with requests in flight) is not reloaded until it drains, bounded by the
+    # window plus one upstream timeout so a stuck request cannot stall rotation.
+    deadline = time.monotonic() + GRACE_WINDOW + UPSTREAM_TIMEOUT
+    while (generations.busy(node) or node_pool.inflight(node) > 0) and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+
+def _new_mutation_executor() -> ProcessPoolExecutor:
+    # A spawned (not forked) single worker keeps the proxy's sockets and threads
+    # out of the child and serialises generations in order.
+    return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+@app.on_event("shutdown")
+async def stop_mutation_worker():
+    if mutation_executor is not None:
+        mutation_executor.shutdown(wait=False, cancel_futures=True)
 
 async def mutation_loop():
-    # Background loop that periodically triggers new AST mutation cycles and
-    # rotates the active backend node so that the attack surface keeps shifting.
-    global current_mapping, current_node_index
+    # Background loop that renames routes on their own schedules so that the
+    # attack surface keeps shifting. Each rotation is a patch: only the routes
+    # that are due get new paths, and everything else keeps serving unchanged.
+    # The patch is prepared in the worker while the current generation serves.
+    # The incoming cohort is warmed PREWARM_LEAD seconds ahead, so the rotation
+    # itself is just a reference swap (except on a lone node, see prewarm_cohort).
+    global current_mapping, mutation_executor, rotation_schedule
+    loop = asyncio.get_running_loop()
+    mutation_executor = _new_mutation_executor()
+    rotation_schedule = RotationSchedule(MUTATION_COALESCE, PREWARM_LEAD)
+    skip_warned_at, skipped = -SKIP_WARNING_INTERVAL, 0
+    # Reading the intervals parses the template, so it never runs on the loop:
+    # a rotation brings them back from the worker, otherwise a thread reads them.
+    rotation_schedule.sync(await asyncio.to_thread(route_intervals, MUTATION_INTERVAL), loop.time())
+
     while True:
-        await asyncio.sleep(MUTATION_INTERVAL)
+        tick, due = rotation_schedule.next_batch()
+        if not due:
+            await asyncio.sleep(MUTATION_INTERVAL)
+            rotation_schedule.sync(await asyncio.to_thread(route_intervals, MUTATION_INTERVAL), loop.time())
+            continue
+        set_next_rotation(tick)
+        next_generation = loop.run_in_executor(
+            mutation_executor, prepare_mutation, dict(current_mapping), due, MUTATION_INTERVAL,
+        )
+        await asyncio.sleep(max(0.0, tick - PREWARM_LEAD - loop.time()))
+        installed = False
         try:
-            print_log("MUTATOR", "Rewriting AST...", Fore.YELLOW)
-            current_mapping = run_mutation()
+            prepared = await next_generation
+            if prepared:
+                stage_timer.record(prepared["stages"])
+                # Incoming nodes are reloaded only after their previous
+                # generation drained, and before any traffic is routed to them.
+                cohort = await prewarm_cohort(prepared, tick)
+                if not cohort:
+                    metrics.incr("rotations_skipped")
+                    skipped += 1
+                    if loop.time() - skip_warned_at >= SKIP_WARNING_INTERVAL:
+                        events.emit("warning", message="No healthy standby node could be warmed; keeping the current "
+                                                       f"generation ({skipped} rotation(s) skipped).")
+                        skip_warned_at, skipped = loop.time(), 0
+                else:
+                    await asyncio.sleep(max(0.0, tick - loop.time()))
+                    mark = stage_timer.start()
+                    generation = Generation(generations.next_id(), prepared["route_map"], prepared["route_index"], cohort)
+                    install_generation(generation, prepared.get("body_limits"))
+                    stage_timer.lap("rotation.install", mark)
+                    current_mapping = generation.mapping
+                    loop.call_later(GRACE_WINDOW, generations.expire)
+                    metrics.rotation(prepared["duration"] * 1000)
+                    rotation_schedule.mark_rotated(due, loop.time())
+                    set_next_rotation(rotation_schedule.next_batch()[0])
+                    share_generation(generation)
+                    persist_snapshot(prepared)
+                    installed = True
+                    events.emit("mutation", generation=generation.id, routes=len(generation.mapping),
+                                patched=sorted(prepared["changed"]), duration_ms=prepared["duration"] * 1000)
+                    events.emit("switch", generation=generation.id, node="+".join(node["name"] for node in cohort))
+        except BrokenProcessPool as e:
+            metrics.incr("mutation_failures")
+            events.emit("error", message=f"Mutation worker died, restarting it: {e}")
+            mutation_executor = _new_mutation_executor()
         except Exception as e:
-            print_log("ERROR", f"Mutation failed: {e}", Fore.RED)
-            print(traceback.format_exc())
+            metrics.incr("mutation_failures")
+            events.emit("error", message=f"Mutation failed: {e}", traceback=traceback.format_exc())
+        if not installed:
+            rotation_schedule.postpone(due, loop.time(), ROTATION_RETRY)
+        # Picks up edits to the template or its mutation policy.
+        try:
+            intervals = prepared["intervals"] if installed else await asyncio.to_thread(route_intervals, MUTATION_INTERVAL)
+            rotation_schedule.sync(intervals, loop.time())
+        except OSError as e:
+            events.emit("warning", message=f"Keeping the previous rotation schedule: {e}")
+
+def set_next_rotation(tick: float):
+    # Converts a loop-clock deadline into wall time for telemetry.
+    global next_rotation_at
+    next_rotation_at = time.time() + (tick - asyncio.get_running_loop().time())
+
+def worker_metrics() -> Dict:
+    # This worker's share of the telemetry, as posted to the metrics board.
+    return {
+        "pid": os.getpid(),
+        "ts": time.time(),
+        "leader": leader_lock.held or not SHARED_STATE,
+        "metrics": metrics.export(),
+        "stages": stage_timer.export(),
+        "tarpit": tarpit.stats(),
+        "honeypot": honeypot.stats(),
+        "events": events.stats(),
+        "schedule": [
+            {"route": path, "in_s": round(max(0.0, due - asyncio.get_running_loop().time()), 1)}
+            for due, path in rotation_schedule.upcoming()
+        ] if rotation_schedule is not None else [],
+    }
+
+def _combined_stats(name: str, reports: List[Dict]) -> Dict:
+    # Activity counts add up over live workers; limits are the same everywhere.
+    stats = dict(reports[0][name])
+    for report in reports[1:]:
+        if time.time() - report["ts"] < WORKER_STALE_AFTER:
+            for key in SUMMED_STATS[name]:
+                stats[key] = stats.get(key, 0) + report[name].get(key, 0)
+    return stats
 
-        current_node_index = (current_node_index + 1) % len(NODES)
-        active_node = NODES[current_node_index]
-        print_log("SWITCH", f"Traffic re-routed to Node {active_node['name']}", Fore.GREEN)
+def build_metrics_snapshot() -> bytes:
+    # Counters and histograms cover every worker: this one's live state plus
+    # what the others last posted. Generation and node state are the same
+    # everywhere, so they come from this worker.
+    current = generations.current
+    own = worker_metrics()
+    reports = [own]
+    if metrics_board is not None:
+        reports += [report for slot, report in metrics_board.read_all().items() if slot != metrics_board.slot]
+    combined, stages = Metrics(), StageTimer()
+    for report in reports:
+        combined.absorb(report["metrics"])
+        stages.absorb(report["stages"])
+    leader = next((report for report in reports if report["leader"]), own)
+    snapshot = combined.snapshot(
+        mutation_interval=MUTATION_INTERVAL,
+        next_rotation_at=next_rotation_at,
+        schedule=leader["schedule"],
+        worker={"pid": os.getpid(), "leader": own["leader"], "workers": PROXY_WORKERS, "reporting": len(reports)},
+        generation=current.id if current is not None else 0,
+        active_nodes=[node["name"] for node in node_pool.serving(current.nodes, current.id)] if current is not None else [],
+        nodes=node_pool.stats(current),
+        retired_generations=len(generations.retired),
+        routes=current.mapping if current is not None else {},
+        tarpit=_combined_stats("tarpit", reports),
+        honeypot=_combined_stats("honeypot", reports),
+        reputation=ip_reputation.stats(),
+        replay=replay_index.stats(),
+        events=_combined_stats("events", reports),
+        stages=stages.snapshot(),
+        profiler=sampler.stats(),
+    )
+    return json.dumps(snapshot, separators=(",", ":")).encode("utf-8")
+
+@app.get(METRICS_PATH)
+async def metrics_snapshot(request: Request):
+    # Loopback-only telemetry for the dashboard. The document is rebuilt at most
+    # once per METRICS_CACHE_TTL, so polling it costs the proxy next to nothing.
+    # Anyone else gets exactly what an unknown path would get.
+    if (request.client.host if request.client else "") not in LOOPBACK_HOSTS:
+        return await gateway(METRICS_PATH.lstrip("/"), request)
+    now = time.monotonic()
+    if now - _metrics_cache["built_at"] >= METRICS_CACHE_TTL:
+        _metrics_cache["body"] = build_metrics_snapshot()
+        _metrics_cache["built_at"] = now
+    return Response(content=_metrics_cache["body"], media_type="application/json")
+
+def profile_status() -> Dict:
+    # Each worker profiles itself; the pid says which one answered.
+    return {"pid": os.getpid(), "stages": stage_timer.enabled, "sampler": sampler.stats()}
+
+@app.get(PROFILE_PATH)
+async def profile_state(request: Request):
+    if (request.client.host if request.client else "") not in LOOPBACK_HOSTS:
+        return await gateway(PROFILE_PATH.lstrip("/"), request)
+    return JSONResponse(content=profile_status())
+
+@app.post(PROFILE_PATH)
+async def profile_control(request: Request):
+    # Loopback-only switches, given as query parameters:
+    #   stages=on|off                    per-stage histograms
+    #   sampling=on|off [seconds=] [hz=] sampling profiler run on the event loop
+    # Parameters are parsed here rather than by FastAPI so that a malformed
+    # request from elsewhere gets the same answer as any unknown path. Like
+    # the metrics, this is guarded by the loopback check alone: the control
+    # token is the nodes' reload secret and is never handed to operators.
+    if (request.client.host if request.client else "") not in LOOPBACK_HOSTS:
+        return await gateway(PROFILE_PATH.lstrip("/"), request)
+    params = request.query_params
+    try:
+        seconds = float(params.get("seconds", PROFILE_SECONDS))
+        hz = float(params.get("hz", PROFILE_HZ))
+    except ValueError:
+        return JSONResponse(content={"error": "seconds and hz must be numbers"}, status_code=400)
+    if "stages" in params:
+        stage_timer.enabled = params["stages"] == "on"
+    if params.get("sampling") == "on":
+        if not sampler.start(threading.get_ident(), hz, seconds):
+            return JSONResponse(content={"error": "sampler already running", **profile_status()}, status_code=409)
+        events.emit("system", message=f"Sampling profiler started ({sampler.hz:g} Hz, up to {seconds:g}s).")
+    elif params.get("sampling") == "off":
+        sampler.stop()
+    return JSONResponse(content=profile_status())
 
-@app.api_route("/{path_name:path}", methods=["GET", "POST", "PUT", "DELETE"])
+@app.get(PROFILE_PATH + "/folded")
+async def profile_folded(request: Request):
+    # Folded stacks of the last (or running) sampler run, ready for
+    # flamegraph.pl or speedscope.
+    if (request.client.host if request.client else "") not in LOOPBACK_HOSTS:
+        return await gateway(PROFILE_PATH.lstrip("/") + "/folded", request)
+    return PlainTextResponse(content=sampler.folded())
+
+@app.api_route("/{path_name:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"])
 async def gateway(path_name: str, request: Request):
     # Main proxy routing handler. Decides between forwarding requests or
     # activating deception paths depending on whether the route is still valid.
-    global current_mapping, ip_reputation
     original_path = f"/{path_name}"
-    target_node = NODES[current_node_index]
     client_ip = request.client.host or "127.0.0.1"
 
     # Basic resistance mechanism: slow down any IP that has triggered traps before.
-    suspicion_score = ip_reputation.get(client_ip, 0)
-    if suspicion_score > 0:
-        await asyncio.sleep(secrets.randbelow(10) / 10.0)
+    # Holding a request costs a tarpit slot; when none is free the client is
+    # turned away at once instead of being parked indefinitely.
+    suspicion_score = ip_reputation.score(client_ip)
+    if suspicion_score >= 0.5:
+        lease = tarpit.enter(client_ip)
+        if lease is None:
+            return Response(status_code=429, headers={"Connection": "close", "Retry-After": "10"})
+        try:
+            await tarpit.delay(secrets.randbelow(10) / 10.0)
+        finally:
+            lease.release()
 
-    # If the proxy lost its in-memory state, try restoring from /tmp at runtime.
-    if not current_mapping:
-        current_mapping = load_state_from_tmp()
-
-    # If the requested route is valid, forward it to the active node.
-    if original_path in current_mapping:
-        actual_path = current_mapping[original_path]
-        target_url = f"{target_node['url']}{actual_path}"
-        print_log("PROXY", f"Forwarding: {original_path} -> {actual_path}", Fore.CYAN)
-
-        transport = httpx.AsyncHTTPTransport(retries=3)
-        async with httpx.AsyncClient(transport=transport) as client:
-            try:
-                req_body = await request.body()
-                # Strip or adjust headers that may interfere with upstream behavior.
-                headers = {k: v for k, v in request.headers.items() if k.lower() not in ("host", "content-length")}
-                resp = await client.request(
-                    method=request.method,
-                    url=target_url,
-                    headers=headers,
-                    content=req_body,
-                    params=request.query_params,
-                    timeout=5.0
-                )
-                try:
-                    content = resp.json()
-                except Exception:
-                    content = resp.text
-                return JSONResponse(content=content, status_code=resp.status_code)
-            except Exception as e:
-                print_log("PROXY", f"Forwarding error: {e}", Fore.RED)
-                return JSONResponse(content={"error": "Node Sync Error"}, status_code=503)
+    # Until a generation is installed nothing can be told apart from a probe,
+    # so the client is asked to retry instead of being sent to the honeypot.
+    if generations.current is None or not current_mapping:
+        return JSONResponse(content={"error": "Node Sync Error"}, status_code=503, headers={"Retry-After": "1"})
+
+    # Stage marks start after the deliberate tarpit delay above.
+    mark = stage_timer.start()
+
+    # If the requested route (including templated and trailing-slash forms)
+    # resolves in the current generation, or in one still inside its grace
+    # window, forward it to one of the nodes serving that generation. The
+    # generation and node stay pinned until the response has been fully relayed.
+    lease = generations.acquire(request.method, original_path)
+    mark = stage_timer.lap("gateway.lookup", mark)
+    if lease is not None:
+        generation, actual_path = lease
+        node = node_pool.pick(generation)
+        node_pool.enter(node)
+        events.emit("forward", path=original_path, target=actual_path, generation=generation.id,
+                    node=node["name"], method=request.method)
+
+        client = upstream_clients[node["name"]]
+        try:
+            # Stream the request body straight through; nothing is buffered or
+            # re-encoded, so binary and non-JSON payloads survive untouched.
+            upstream_request = client.build_request(
+                method=request.method,
+                url=actual_path,
+                headers=_forwardable_headers(request.headers, drop=("host", CONTROL_TOKEN_HEADER)),
+                content=request.stream() if _has_body(request) else None,
+                params=request.query_params,
+            )
+            mark = stage_timer.lap("gateway.prepare", mark)
+            forward_started = time.perf_counter()
+            resp = await client.send(upstream_request, stream=True)
+            metrics.observe("forward_latency", (time.perf_counter() - forward_started) * 1000)
+            mark = stage_timer.lap("gateway.upstream", mark)
+            metrics.incr("forwards")
+        except BodyLimitExceeded:
+            # The client streamed past its limit; the body guard answers 413.
+            generations.release(generation)
+            node_pool.leave(node)
+            raise
+        except Exception as e:
+            generations.release(generation)
+            node_pool.leave(node)
+            metrics.incr("forward_errors")
+            events.emit("error", message=f"Forwarding error: {e}", path=original_path, node=node["name"])
+            return JSONResponse(content={"error": "Node Sync Error"}, status_code=503)
+
+        # Relay status, headers and content-type verbatim and pipe the raw body
+        # back to the client; the upstream connection returns to the pool once
+        # the response has been fully sent.
+        relay = _UpstreamRelay(resp, generation, node)
+        response = StreamingResponse(
+            relay.body(),
+            status_code=resp.status_code,
+            background=BackgroundTask(relay.finish),
+        )
+        response.raw_headers = [
+            (k, v) for k, v in resp.headers.raw
+            if k.lower().decode("latin-1") not in HOP_BY_HOP_HEADERS | PROXY_OWNED_RESPONSE_HEADERS
+        ]
+        stage_timer.lap("gateway.respond", mark)
+        return response
 
     # Requests for routes that no longer exist (i.e., mutated out) are treated
-    # as hostile or replayed attacks and are funneled into the honeypot.
-    print_log("SECURITY", f"⚠️ INTRUSION DETECTED: {original_path}", Fore.RED)
-    ip_reputation[client_ip] = ip_reputation.get(client_ip, 0) + 1
-    await asyncio.sleep(0.3)
-    return JSONResponse(content=FAKE_DB, status_code=200)
+    # as hostile or replayed attacks and are funneled into the honeypot. The
+    # event says whether the path carries a live mutated token, replays one we
+    # served, is a near-miss on a known route or is noise.
+    classification, replayed_from = replay_index.classify(original_path)
+    events.emit("intrusion", path=original_path, ip=client_ip, method=request.method,
+                classification=classification, replayed_generation=replayed_from)
+    metrics.intrusion(original_path, classification)
+    ip_reputation.increment(client_ip)
+    mark = stage_timer.lap("gateway.classify", mark)
+
+    # The decoy is drip-fed from a tarpit slot. Once the tarpit is full the
+    # payload goes out in one piece and the connection is closed. A request
+    # body sent here is never read; closing the connection after the decoy
+    # discards whatever the client is still uploading.
+    decoy = honeypot.render(client_ip, original_path)
+    stage_timer.lap("gateway.decoy", mark)
+    lease = tarpit.enter(client_ip)
+    if lease is None:
+        return Response(content=decoy, media_type="application/json", headers={"Connection": "close"})
+    headers = {"Content-Length": str(len(decoy))}
+    if _has_body(request):
+        headers["Connection"] = "close"
+    return StreamingResponse(
+        tarpit.drip(lease, decoy),
+        media_type="application/json",
+        headers=headers,
+        background=BackgroundTask(lease.aclose),
+    )
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvicorn's per-request access log would put a synchronous stdout write back
+    # on the hot path; forward events already cover it.
+    access_log = os.environ.get("CHAMELEON_ACCESS_LOG", "0") == "1"
+    if PROXY_WORKERS > 1:
+        # Start every multi-worker run from clean shared state; workers import
+        # the app by name so each gets its own event loop and module globals.
+        for path in (GENERATION_CHANNEL_PATH, REPUTATION_SHARED_PATH, METRICS_BOARD_PATH):
+            if os.path.exists(path):
+                os.remove(path)
+        os.environ.setdefault("CHAMELEON_HONEYPOT_KEY", secrets.token_hex(32))
+        uvicorn.run("core.proxy:app", host="0.0.0.0", port=8000, workers=PROXY_WORKERS, access_log=access_log)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000, access_log=access_log)
@@ -0,0 +1,89 @@
+# core/replay.py
+# Classifies requests that missed every live route. Each generation renames one
+# segment per route, such as /admin/login -> /admin/login_x1y2z3. The index keeps
+# those renamed segments, tagged with their generation, for the last `depth`
+# generations only, so memory stays fixed however long the system runs. It
+# also keeps the original segments they were derived from. A miss is then one
+# of:
+#   live-token    carries a renamed segment of the current generation: a live
+#                 mutated path requested directly, i.e. one that leaked
+#   stale-replay  carries a renamed segment we actually served
+#                 (a captured path being replayed)
+#   near-miss     aims at a known route with an expired or forged suffix
+#   never-valid   noise or scanning that matches nothing we ever served
+# Lookups touch one dict entry per path segment.
+
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from mutator import mutated_segment  # type: ignore
+
+LIVE_TOKEN = "live-token"
+STALE_REPLAY = "stale-replay"
+NEAR_MISS = "near-miss"
+NEVER_VALID = "never-valid"
+
+# Only the leading segments are inspected; routes are never deeper than this.
+MAX_SEGMENTS = 16
+
+class ReplayIndex:
+    def __init__(self, depth: int = 16):
+        self.depth = depth
+        self.tokens: Dict[Tuple[int, str], int] = {}   # (position, renamed segment) -> generation
+        self.bases: Dict[Tuple[int, str], int] = {}    # (position, original segment) -> generation
+        self.history: Deque[Tuple[int, List[Tuple[int, str]]]] = deque()
+        self.latest = 0
+
+    def add_generation(self, generation_id: int, route_map: Dict[str, str]):
+        keys = []
+        for original, target in route_map.items():
+            renamed = mutated_segment(original, target)
+            if renamed is None:
+                continue
+            position, segment, base = renamed
+            self.tokens[(position, segment)] = generation_id
+            if base:
+                self.bases[(position, base)] = generation_id
+            keys.append((position, segment))
+        self.history.append((generation_id, keys))
+        self.latest = max(self.latest, generation_id)
+
+        # Forget the oldest generation once more than `depth` are indexed. A
+        # token re-used by a newer generation keeps that newer tag.
+        while len(self.history) > self.depth:
+            expired, expired_keys = self.history.popleft()
+            for key in expired_keys:
+                if self.tokens.get(key) == expired:
+                    del self.tokens[key]
+            # Original segments only change with the template; drop the ones
+            # no generation left in the window was built from.
+            oldest = self.history[0][0]
+            for key in [key for key, tagged in self.bases.items() if tagged < oldest]:
+                del self.bases[key]
+
+    def classify(self, path: str) -> Tuple[str, Optional[int]]:
+        # Returns the class and, for live tokens and replays, the generation
+        # the path is from. The newest indexed generation is the current one;
+        # tokens it kept from earlier generations carry its tag.
+        segments = path.split("/", MAX_SEGMENTS)[:MAX_SEGMENTS]
+        for position, segment in enumerate(segments):
+            generation = self.tokens.get((position, segment))
+            if generation is not None:
+                return (LIVE_TOKEN if generation == self.latest else STALE_REPLAY), generation
+        for position, segment in enumerate(segments):
+            if (position, segment) in self.bases:
+                return NEAR_MISS, None
+            cut = segment.find("_")
+            while cut > 0:
+                if (position, segment[:cut]) in self.bases:
+                    return NEAR_MISS, None
+                cut = segment.find("_", cut + 1)
+        return NEVER_VALID, None
+
+    def stats(self) -> Dict:
+        return {
+            "depth": self.depth,
+            "generations": len(self.history),
+            "tokens": len(self.tokens),
+            "bases": len(self.bases),
+        }
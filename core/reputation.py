@@ -0,0 +1,128 @@
+# core/reputation.py
+# Bounded store for per-IP suspicion scores. Hot offenders live in an LRU table
+# with a fixed number of slots; scores decay exponentially so old offences fade
+# out. Optionally, IPs evicted from the table fold their score into a count-min
+# sketch, which keeps an approximate memory of the long tail in a fixed-size
+# array. Memory use is therefore constant no matter how many distinct scanners
+# show up. The sketch trades precision for memory: once the number of distinct
+# offenders per half-life greatly exceeds its width, every estimate inflates, so
+# size it to the expected scan volume.
+#
+# Aging the sketch is a full pass over its counters, tens of milliseconds on a
+# wide shared sketch, so it never runs on a lookup: the owner calls
+# age_sketch() once per half-life off the event loop (see lead() in proxy.py).
+
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import Dict, Optional
+
+class CountMinSketch:
+    # Fixed-size approximate counter. Estimates never undercount; collisions can
+    # only inflate them. Counters are halved every half-life to mirror decay.
+    def __init__(self, width: int = 16384, depth: int = 4, rows: Optional[list] = None):
+        # `rows` lets several processes share counters living in shared memory
+        # (see core/shared.py); by default the sketch is private to this process.
+        self.width = width
+        self.depth = depth
+        self.rows = rows if rows is not None else [array("f", bytes(4 * width)) for _ in range(depth)]
+
+    def _slots(self, key: str):
+        raw = key.encode("utf-8")
+        for row in range(self.depth):
+            yield row, zlib.crc32(raw, row * 0x9E3779B1 & 0xFFFFFFFF) % self.width
+
+    def add(self, key: str, amount: float):
+        # Conservative update: only raise counters up to the new estimate, which
+        # keeps collision-driven overestimation much lower than plain adds.
+        slots = list(self._slots(key))
+        target = min(self.rows[row][slot] for row, slot in slots) + amount
+        for row, slot in slots:
+            if self.rows[row][slot] < target:
+                self.rows[row][slot] = target
+
+    def estimate(self, key: str) -> float:
+        return min(self.rows[row][slot] for row, slot in self._slots(key))
+
+    def halve(self):
+        for row in self.rows:
+            for slot in range(self.width):
+                if row[slot]:
+                    row[slot] *= 0.5
+
+class ReputationStore:
+    # With a shared sketch (multi-worker proxy), every increment is also added
+    # to the shared counters and a score is the larger of the local and shared
+    # views, so an IP flagged by one worker is slowed down by all of them. Only
+    # the mutation leader ages shared counters.
+    def __init__(self, capacity: int = 100_000, half_life: float = 300.0, sketch_width: int = 0,
+                 shared_sketch: Optional[CountMinSketch] = None):
+        self.capacity = capacity
+        self.half_life = half_life
+        self._entries: "OrderedDict[str, list]" = OrderedDict()  # ip -> [score, updated_at]
+        self.shared = shared_sketch is not None
+        self.sketch: Optional[CountMinSketch] = shared_sketch or (CountMinSketch(sketch_width) if sketch_width else None)
+        self.evictions = 0
+
+    def _decayed(self, score: float, since: float, now: float) -> float:
+        return score * 0.5 ** ((now - since) / self.half_life)
+
+    def age_sketch(self):
+        # Halves every sketch counter; meant to be called once per half-life
+        # from a worker thread. An add racing the pass may keep or lose one
+        # halving, which only nudges an already approximate count.
+        if self.sketch is not None:
+            self.sketch.halve()
+
+    def _remembered(self, ip: str) -> float:
+        # Whatever the sketch still holds for this IP from earlier evictions.
+        if self.sketch is None:
+            return 0.0
+        return self.sketch.estimate(ip)
+
+    def score(self, ip: str) -> float:
+        # O(1): the live table score plus anything folded into the sketch.
+        now = time.monotonic()
+        entry = self._entries.get(ip)
+        live = self._decayed(entry[0], entry[1], now) if entry is not None else 0.0
+        if self.shared:
+            return max(live, self._remembered(ip))
+        return live + self._remembered(ip)
+
+    def increment(self, ip: str, amount: float = 1.0) -> float:
+        # O(1): decay the stored score to now, add, and mark as most recent.
+        now = time.monotonic()
+        entry = self._entries.get(ip)
+        if entry is None:
+            entry = self._entries[ip] = [0.0, now]
+            if len(self._entries) > self.capacity:
+                self._evict()
+        else:
+            self._entries.move_to_end(ip)
+        entry[0] = self._decayed(entry[0], entry[1], now) + amount
+        entry[1] = now
+        if self.shared:
+            self.sketch.add(ip, amount)
+            return max(entry[0], self._remembered(ip))
+        return entry[0] + self._remembered(ip)
+
+    def _evict(self):
+        # Drops the least recently seen IP, keeping its score in the sketch.
+        ip, (score, updated_at) = self._entries.popitem(last=False)
+        self.evictions += 1
+        if self.sketch is not None and not self.shared:
+            self.sketch.add(ip, self._decayed(score, updated_at, time.monotonic()))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "occupancy": len(self._entries),
+            "capacity": self.capacity,
+            "evictions": self.evictions,
+            "half_life": self.half_life,
+            "sketch_width": self.sketch.width if self.sketch is not None else 0,
+            "sketch_shared": self.shared,
+        }
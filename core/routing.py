@@ -0,0 +1,156 @@
+# core/routing.py
+# Compiled route table used by the proxy to translate public paths into their
+# mutated counterparts. Routes are stored in a segment trie so lookups cost
+# O(path length) regardless of how many routes a generation contains, and
+# templated segments such as /users/{id} capture values that are substituted
+# into the mutated target path.
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+ANY_METHOD = "*"
+# Never captured: "/files/{name:path}" must not let "/files/../admin" climb out
+# of its mutated prefix once the upstream client normalises the target.
+DOT_SEGMENTS = frozenset((".", ".."))
+
+def split_path(path: str) -> List[str]:
+    # "/users/42/" and "/users/42" resolve identically; empty segments are dropped.
+    return [segment for segment in path.split("/") if segment]
+
+def _parse_param(segment: str) -> Optional[Tuple[str, bool]]:
+    # Returns (name, is_greedy) for "{name}" / "{name:convertor}" segments.
+    if not (segment.startswith("{") and segment.endswith("}")):
+        return None
+    name, _, convertor = segment[1:-1].partition(":")
+    return name, convertor == "path"
+
+class _TrieNode:
+    __slots__ = ("static", "param", "tail", "targets")
+
+    def __init__(self):
+        self.static: Dict[str, "_TrieNode"] = {}
+        self.param: Optional["_TrieNode"] = None      # child for a single "{name}" segment
+        self.tail: Optional[Dict[str, tuple]] = None  # "{name:path}" swallows the remainder
+        self.targets: Dict[str, tuple] = {}           # method -> compiled target template
+
+def _compile_target(path: str, positions: Dict[str, int], route: str) -> tuple:
+    # The target path as literal segments and references to captured values by
+    # position, plus whether the declared route ends in a slash. Rendering the
+    # target exactly as declared keeps the node from answering with a redirect
+    # that would leak the mutated path. The public route it was declared for
+    # rides along for per-route lookups. Each captured value carries the
+    # characters left unescaped when it is rendered: none for a single segment,
+    # "/" for a "{name:path}" tail.
+    compiled = []
+    for segment in split_path(path):
+        param = _parse_param(segment)
+        compiled.append((True, positions[param[0]], "/" if param[1] else "") if param else (False, segment, ""))
+    return compiled, path.endswith("/") and len(path) > 1, route
+
+def _render_target(target: tuple, captured: List[str]) -> str:
+    # Captured values arrive percent-decoded, so they are re-encoded before
+    # being spliced in; otherwise "/users/1%3Fx" would reach the node as a
+    # query string and "%2F" as an extra segment.
+    compiled, trailing_slash, _ = target
+    rendered = "/" + "/".join(
+        quote(captured[value], safe=safe) if is_param else value for is_param, value, safe in compiled
+    )
+    if trailing_slash:
+        rendered += "/"
+    return rendered
+
+class RouteIndex:
+    # One immutable trie per mutation generation, built once by the mutator.
+    def __init__(self):
+        self.root = _TrieNode()
+        self.size = 0
+
+    @classmethod
+    def from_routes(cls, routes: Iterable[dict]) -> "RouteIndex":
+        # routes: [{"methods": ["GET"], "path": "/users/{id}", "target": "/users_x1/{id}"}, ...]
+        index = cls()
+        for route in routes:
+            index.add(route.get("methods") or [ANY_METHOD], route["path"], route["target"])
+        return index
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[str, str]) -> "RouteIndex":
+        # Legacy path -> path state (e.g. restored from disk) carries no methods.
+        return cls.from_routes({"path": path, "target": target} for path, target in mapping.items())
+
+    def add(self, methods: Iterable[str], path: str, target: str):
+        # Parameters are captured positionally, so routes sharing a trie branch
+        # may name their parameters differently.
+        node = self.root
+        positions: Dict[str, int] = {}
+        greedy = False
+        for segment in split_path(path):
+            param = _parse_param(segment)
+            if param is None:
+                node = node.static.setdefault(segment, _TrieNode())
+                continue
+            positions[param[0]] = len(positions)
+            if param[1]:
+                greedy = True
+                break
+            if node.param is None:
+                node.param = _TrieNode()
+            node = node.param
+
+        compiled = _compile_target(target, positions, path)
+        if greedy:
+            node.tail = node.tail or {}
+            bucket = node.tail
+        else:
+            bucket = node.targets
+        for method in methods:
+            bucket[method.upper()] = compiled
+        self.size += 1
+
+    @staticmethod
+    def _pick(bucket: Optional[Dict[str, tuple]], method: str) -> Optional[tuple]:
+        if not bucket:
+            return None
+        return bucket.get(method) or bucket.get(ANY_METHOD)
+
+    def _match(self, node: _TrieNode, segments: List[str], position: int, method: str, captured: List[str]):
+        # Static segments are tried before parameters; a branch only backtracks
+        # when it dead-ends, so typical lookups touch each segment once.
+        if position == len(segments):
+            compiled = self._pick(node.targets, method)
+            if compiled is not None:
+                return compiled, captured
+        else:
+            segment = segments[position]
+            child = node.static.get(segment)
+            if child is not None:
+                found = self._match(child, segments, position + 1, method, captured)
+                if found is not None:
+                    return found
+            if node.param is not None:
+                found = self._match(node.param, segments, position + 1, method, captured + [segment])
+                if found is not None:
+                    return found
+
+        tail = self._pick(node.tail, method)
+        if tail is not None and position < len(segments):
+            return tail, captured + ["/".join(segments[position:])]
+        return None
+
+    def _lookup(self, method: str, path: str):
+        segments = split_path(path)
+        if not DOT_SEGMENTS.isdisjoint(segments):
+            return None
+        return self._match(self.root, segments, 0, method.upper(), [])
+
+    def resolve(self, method: str, path: str) -> Optional[str]:
+        # Maps a public request path to its mutated target, or None on a miss.
+        found = self._lookup(method, path)
+        if found is None:
+            return None
+        return _render_target(*found)
+
+    def route(self, method: str, path: str) -> Optional[str]:
+        # The declared public route (e.g. "/users/{id}") a request path matches.
+        found = self._lookup(method, path)
+        return found[0][2] if found is not None else None
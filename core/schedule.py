@@ -0,0 +1,59 @@
+# core/schedule.py
+# Per-route rotation schedule for the mutation loop. Every mutable route has its
+# own interval (from the template's mutation policy) and its own due time.
+# Routes that share an interval start at evenly spread phases, so they do not
+# all come due at the same moment. Routes that fall due within `coalesce`
+# seconds of the earliest one are renamed together in one patch, which keeps
+# the number of node reloads down without going back to one global spike.
+# Work on a batch starts `lead` seconds before it is due (the proxy prewarms
+# nodes that far ahead), which retries account for.
+
+import heapq
+from typing import Dict, List, Tuple
+
+class RotationSchedule:
+    def __init__(self, coalesce: float = 1.0, lead: float = 0.0):
+        self.coalesce = coalesce
+        self.lead = lead
+        self.intervals: Dict[str, float] = {}
+        self.due: Dict[str, float] = {}
+
+    def sync(self, intervals: Dict[str, float], now: float):
+        # Adopts the current policy. New routes (and routes whose interval
+        # changed) are phased in; routes gone from the template are dropped.
+        for path in list(self.due):
+            if path not in intervals:
+                del self.due[path]
+        fresh: Dict[float, List[str]] = {}
+        for path, interval in intervals.items():
+            if self.intervals.get(path) != interval:
+                fresh.setdefault(interval, []).append(path)
+        for interval, paths in fresh.items():
+            for position, path in enumerate(sorted(paths)):
+                self.due[path] = now + interval * (position + 1) / len(paths)
+        self.intervals = dict(intervals)
+
+    def next_batch(self) -> Tuple[float, List[str]]:
+        # (time of the next rotation, routes renamed in it).
+        if not self.due:
+            return float("inf"), []
+        earliest = min(self.due.values())
+        batch = [path for path, due in self.due.items() if due <= earliest + self.coalesce]
+        return max(self.due[path] for path in batch), sorted(batch)
+
+    def mark_rotated(self, paths: List[str], at: float):
+        for path in paths:
+            if path in self.due:
+                self.due[path] = at + self.intervals[path]
+
+    def postpone(self, paths: List[str], now: float, delay: float):
+        # Retries a batch that could not be installed: work on it starts again
+        # no sooner than `delay` seconds from now, so a batch that keeps failing
+        # cannot spin.
+        until = now + delay + self.lead
+        for path in paths:
+            if path in self.due:
+                self.due[path] = max(self.due[path], until)
+
+    def upcoming(self, limit: int = 5) -> List[Tuple[float, str]]:
+        return heapq.nsmallest(limit, ((due, path) for path, due in self.due.items()))
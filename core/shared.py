@@ -0,0 +1,156 @@
+# core/shared.py
+# Cross-process state for running the proxy with several uvicorn workers.
+# One worker wins a file lock and becomes the leader: it alone runs mutation and
+# node rotation and publishes each generation into a memory-mapped region. The
+# other workers poll an 8-byte version counter at the head of that region and
+# only decode the payload when it changes. Writes follow a seqlock protocol
+# (odd version while writing, even when stable), so readers never act on a torn
+# payload and never block the writer.
+#
+# Telemetry is per worker, so each worker also claims one slot of a metrics
+# board (same seqlock layout per slot) and publishes its raw counters there;
+# whichever worker answers a metrics request adds the slots up.
+
+import fcntl
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Optional, Tuple
+
+# /dev/shm keeps the mapping in RAM; fall back to /tmp where it is missing.
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else "/tmp"
+
+class SharedRegion:
+    # A fixed-size file mapped into every worker's address space.
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self.map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+    def close(self):
+        self.map.close()
+
+# Seqlock slot header: version (u64), payload length (u32). Payload: UTF-8 JSON.
+SLOT_HEADER = struct.Struct("<QI")
+
+def _slot_version(buffer, offset: int) -> int:
+    return struct.unpack_from("<Q", buffer, offset)[0]
+
+def _slot_write(buffer, offset: int, size: int, payload: Dict):
+    # Single writer per slot. A writer that died mid-write leaves an odd
+    # version behind; the next write simply moves past it.
+    data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    if len(data) > size - SLOT_HEADER.size:
+        raise ValueError(f"payload of {len(data)} bytes exceeds its shared slot")
+    writing = _slot_version(buffer, offset) | 1
+    struct.pack_into("<Q", buffer, offset, writing)
+    start = offset + SLOT_HEADER.size
+    buffer[start:start + len(data)] = data
+    struct.pack_into("<I", buffer, offset + 8, len(data))
+    struct.pack_into("<Q", buffer, offset, writing + 1)
+
+def _slot_read(buffer, offset: int, retries: int = 50) -> Optional[Tuple[int, Dict]]:
+    # Returns (version, payload) from a consistent snapshot, or None when
+    # nothing has been written yet.
+    for _ in range(retries):
+        before, length = SLOT_HEADER.unpack_from(buffer, offset)
+        if before == 0:
+            return None
+        if before & 1:
+            time.sleep(0.001)
+            continue
+        start = offset + SLOT_HEADER.size
+        data = buffer[start:start + length]
+        if _slot_version(buffer, offset) == before:
+            return before, json.loads(data)
+    return None
+
+class GenerationChannel(SharedRegion):
+    # One seqlock slot spanning the region; the leader is its only writer.
+    def __init__(self, path: str, size: int = 4 * 1024 * 1024):
+        super().__init__(path, size)
+
+    def version(self) -> int:
+        return _slot_version(self.map, 0)
+
+    def publish(self, payload: Dict):
+        _slot_write(self.map, 0, self.size, payload)
+
+    def read(self, retries: int = 50) -> Optional[Tuple[int, Dict]]:
+        return _slot_read(self.map, 0, retries)
+
+class MetricsBoard(SharedRegion):
+    # `slots` fixed-size seqlock slots, one per worker. A worker claims a free
+    # slot with a per-slot flock, which the kernel drops when it exits, so a
+    # restarted worker takes over the slot of the one it replaces.
+    def __init__(self, path: str, slots: int, slot_size: int = 64 * 1024):
+        super().__init__(path, slots * slot_size)
+        self.slots = slots
+        self.slot_size = slot_size
+        self.slot: Optional[int] = None
+        self._lock: Optional["LeaderLock"] = None
+
+    def claim(self) -> Optional[int]:
+        for slot in range(self.slots):
+            lock = LeaderLock(f"{self.path}.{slot}.lock")
+            if lock.try_acquire():
+                self.slot, self._lock = slot, lock
+                return slot
+        return None
+
+    def publish(self, payload: Dict):
+        if self.slot is not None:
+            _slot_write(self.map, self.slot * self.slot_size, self.slot_size, payload)
+
+    def read(self, slot: int) -> Optional[Dict]:
+        found = _slot_read(self.map, slot * self.slot_size)
+        return found[1] if found is not None else None
+
+    def read_all(self) -> Dict[int, Dict]:
+        return {slot: payload for slot, payload in ((slot, self.read(slot)) for slot in range(self.slots))
+                if payload is not None}
+
+def shared_float_rows(region: SharedRegion, rows: int, width: int) -> list:
+    # Carves `rows` float32 arrays of `width` counters out of a shared region.
+    view = memoryview(region.map)
+    stride = 4 * width
+    if rows * stride > region.size:
+        raise ValueError("shared region too small for the requested counters")
+    return [view[row * stride:(row + 1) * stride].cast("f") for row in range(rows)]
+
+class LeaderLock:
+    # Non-blocking exclusive flock. The kernel drops it when the holder exits,
+    # so a crashed leader is replaced by whichever worker polls next.
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
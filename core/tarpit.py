@@ -0,0 +1,119 @@
+# core/tarpit.py
+# Slows suspicious clients down without letting them pin unbounded resources.
+# All tarpit delays share one timer: waiters sit in a heap ordered by deadline
+# and a single loop callback wakes whichever are due, instead of every held
+# request owning its own sleep. Occupancy is capped per IP and in total; once a
+# cap is hit, new arrivals are shed immediately rather than queued. Honeypot
+# payloads are drip-fed in small chunks so a held response never sits fully
+# buffered while the client waits.
+
+import asyncio
+import heapq
+import itertools
+from typing import AsyncIterator, Dict, List, Optional
+
+class TarpitLease:
+    # One admitted client slot. release() is idempotent so it can be called from
+    # both a body iterator's finally and a response background task.
+    __slots__ = ("tarpit", "ip", "released")
+
+    def __init__(self, tarpit: "Tarpit", ip: str):
+        self.tarpit = tarpit
+        self.ip = ip
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.tarpit._leave(self.ip)
+
+    async def aclose(self):
+        self.release()
+
+class Tarpit:
+    def __init__(self, max_total: int = 1000, max_per_ip: int = 4,
+                 drip_bytes: int = 24, drip_interval: float = 0.05):
+        self.max_total = max_total
+        self.max_per_ip = max_per_ip
+        self.drip_bytes = drip_bytes
+        self.drip_interval = drip_interval
+        self.occupancy = 0
+        self.per_ip: Dict[str, int] = {}
+        self.admitted = 0
+        self.shed = 0
+        self._heap: List[tuple] = []          # (deadline, seq, future)
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_deadline: Optional[float] = None
+
+    def enter(self, ip: str) -> Optional[TarpitLease]:
+        # Admits a client into the tarpit, or returns None when it should be
+        # shed because the global or per-IP cap is already reached.
+        held = self.per_ip.get(ip, 0)
+        if self.occupancy >= self.max_total or held >= self.max_per_ip:
+            self.shed += 1
+            return None
+        self.per_ip[ip] = held + 1
+        self.occupancy += 1
+        self.admitted += 1
+        return TarpitLease(self, ip)
+
+    def _leave(self, ip: str):
+        self.occupancy -= 1
+        held = self.per_ip.get(ip, 1) - 1
+        if held > 0:
+            self.per_ip[ip] = held
+        else:
+            self.per_ip.pop(ip, None)
+
+    def _arm(self, loop: asyncio.AbstractEventLoop):
+        # Keeps exactly one loop timer pointed at the earliest pending deadline.
+        if not self._heap:
+            return
+        deadline = self._heap[0][0]
+        if self._timer is not None and self._timer_deadline <= deadline:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer_deadline = deadline
+        self._timer = loop.call_at(deadline, self._fire, loop)
+
+    def _fire(self, loop: asyncio.AbstractEventLoop):
+        self._timer = None
+        now = loop.time()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, future = heapq.heappop(self._heap)
+            if not future.done():
+                future.set_result(None)
+        self._arm(loop)
+
+    async def delay(self, seconds: float):
+        # Parks the caller until the shared timer reaches its deadline.
+        if seconds <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._heap, (loop.time() + seconds, next(self._seq), future))
+        self._arm(loop)
+        await future
+
+    async def drip(self, lease: TarpitLease, payload: bytes) -> AsyncIterator[bytes]:
+        # Streams the payload a few bytes at a time and frees the slot when the
+        # client finishes or disconnects.
+        try:
+            for start in range(0, len(payload), self.drip_bytes):
+                if start:
+                    await self.delay(self.drip_interval)
+                yield payload[start:start + self.drip_bytes]
+        finally:
+            lease.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "occupancy": self.occupancy,
+            "max_total": self.max_total,
+            "max_per_ip": self.max_per_ip,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "pending_timers": len(self._heap),
+        }
@@ -0,0 +1,304 @@
+# core/template_index.py
+# Static analysis of the FastAPI template the mutator works from. The template
+# is either a single module (target_app/template.py) or a package of modules
+# whose routes live on APIRouter instances mounted with include_router. Each
+# module is parsed once per revision and cached on its own, so editing one
+# router module re-parses only that file. Resolution then follows imports and
+# include_router calls across the modules to find the full path every route is
+# served under: mount prefixes + the router's own prefix + the decorator path.
+#
+# Imports between template modules resolve when they are relative
+# (`from .routers import accounts`) or qualified with the package directory
+# name (`from bank_service.routers import accounts`); those are also the two
+# forms the bundle loader in core/bundle.py serves at runtime.
+
+import ast
+import hashlib
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from profiling import note_stage  # type: ignore
+
+# Decorators that register a route for one HTTP method, plus api_route, whose
+# methods come from its `methods` argument (GET when omitted, as in FastAPI).
+METHOD_DECORATORS = ("get", "post", "put", "delete", "patch", "head", "options", "trace")
+API_ROUTE = "api_route"
+APP_FACTORIES = ("FastAPI",)
+ROUTER_FACTORIES = ("APIRouter",)
+# Module name used for a package template whose directory name is not a valid
+# identifier.
+FALLBACK_ROOT = "chameleon_template"
+
+def _chain(node) -> Optional[Tuple[str, ...]]:
+    # `router` -> ("router",), `users.router` -> ("users", "router").
+    names = []
+    while isinstance(node, ast.Attribute):
+        names.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    names.append(node.id)
+    return tuple(reversed(names))
+
+def keyword_arg(call: ast.Call, name: str) -> Optional[ast.keyword]:
+    for keyword in call.keywords:
+        if keyword.arg == name:
+            return keyword
+    return None
+
+def _literal_prefix(call: ast.Call) -> Optional[str]:
+    # The call's `prefix` argument: "" when omitted, None when not a literal.
+    keyword = keyword_arg(call, "prefix")
+    if keyword is None:
+        return ""
+    if isinstance(keyword.value, ast.Constant) and isinstance(keyword.value.value, str):
+        return keyword.value.value
+    return None
+
+class RouteDecl:
+    # One route decorator: the handler it sits on, the object it registers on
+    # and the literal path node the mutator rewrites.
+    __slots__ = ("function", "owner", "methods", "path_node")
+
+    def __init__(self, function, owner: Tuple[str, ...], methods: List[str], path_node: ast.Constant):
+        self.function = function
+        self.owner = owner
+        self.methods = methods
+        self.path_node = path_node
+
+class TemplateModule(ast.NodeVisitor):
+    # One parsed template module and the facts resolution needs from it. The
+    # tree is kept so the mutator can render it; it is never modified for good.
+    def __init__(self, name: str, source: str, is_package: bool, root: str):
+        self.name = name
+        self.is_package = is_package
+        self.root = root
+        self.tree = ast.parse(source)
+        self.factories: Dict[str, Tuple[str, ast.Call]] = {}          # name -> ("app" | "router", factory call)
+        self.imports: Dict[str, Tuple[str, Optional[str]]] = {}       # local name -> (module, attribute)
+        self.mounts: List[Tuple[Tuple[str, ...], Tuple[str, ...], ast.Call]] = []  # (owner, router, call)
+        self.routes: List[RouteDecl] = []
+        self.visit(self.tree)
+
+    def _absolute(self, module: Optional[str], level: int) -> Optional[str]:
+        # Bundle-relative module name ("" is the package itself), or None for
+        # modules outside the template.
+        if level == 0:
+            if module == self.root:
+                return ""
+            if module and module.startswith(self.root + "."):
+                return module[len(self.root) + 1:]
+            return None
+        parts = self.name.split(".") if self.name else []
+        if not self.is_package:
+            parts = parts[:-1]
+        if level - 1 > len(parts):
+            return None
+        parts = parts[:len(parts) - (level - 1)]
+        if module:
+            parts.append(module)
+        return ".".join(parts)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            target = self._absolute(alias.name, 0)
+            if target is None:
+                continue
+            if alias.asname:
+                self.imports[alias.asname] = (target, None)
+            else:
+                # `import pkg.routers.users` binds only `pkg`.
+                self.imports[alias.name.split(".")[0]] = ("", None)
+
+    def visit_ImportFrom(self, node):
+        base = self._absolute(node.module, node.level)
+        if base is None:
+            return
+        for alias in node.names:
+            self.imports[alias.asname or alias.name] = (base, alias.name)
+
+    def visit_Assign(self, node):
+        value = node.value
+        if isinstance(value, ast.Call):
+            factory = value.func.attr if isinstance(value.func, ast.Attribute) else getattr(value.func, "id", None)
+            kind = "app" if factory in APP_FACTORIES else "router" if factory in ROUTER_FACTORIES else None
+            if kind is not None:
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        self.factories[target.id] = (kind, value)
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Attribute) and node.func.attr == "include_router" and node.args:
+            owner, router = _chain(node.func.value), _chain(node.args[0])
+            if owner is not None and router is not None:
+                self.mounts.append((owner, router, node))
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        for decorator in node.decorator_list:
+            if not (isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute)):
+                continue
+            verb = decorator.func.attr
+            if verb not in METHOD_DECORATORS and verb != API_ROUTE:
+                continue
+            owner = _chain(decorator.func.value)
+            path_node = decorator.args[0] if decorator.args else getattr(keyword_arg(decorator, "path"), "value", None)
+            if owner is None or not (isinstance(path_node, ast.Constant) and isinstance(path_node.value, str)):
+                continue
+            self.routes.append(RouteDecl(node, owner, self._methods(decorator), path_node))
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    @staticmethod
+    def _methods(decorator: ast.Call) -> List[str]:
+        # Empty means "could not tell", which the proxy treats as any method.
+        if decorator.func.attr != API_ROUTE:
+            methods = [decorator.func.attr.upper()]
+        else:
+            keyword = keyword_arg(decorator, "methods")
+            if keyword is None:
+                methods = ["GET"]
+            elif isinstance(keyword.value, (ast.List, ast.Tuple, ast.Set)) and all(
+                    isinstance(item, ast.Constant) and isinstance(item.value, str) for item in keyword.value.elts):
+                methods = [item.value.upper() for item in keyword.value.elts]
+            else:
+                return []
+        return methods
+
+class TemplatePackage:
+    # The template as a whole: its modules by bundle-relative name, the module
+    # defining the app, and whether it has to be shipped as a bundle.
+    def __init__(self, root: str, modules: Dict[str, TemplateModule], digests: Dict[str, str], bundled: bool):
+        self.root = root
+        self.modules = modules
+        self.digests = digests
+        self.bundled = bundled
+        apps = [name for name, module in modules.items()
+                if module.factories.get("app", ("",))[0] == "app"]
+        if not apps:
+            raise ValueError("template does not define `app = FastAPI()`")
+        self.entry = "main" if "main" in apps else sorted(apps)[0]
+
+    def resolve(self, module: str, chain: Tuple[str, ...], depth: int = 0) -> Optional[Tuple[str, str]]:
+        # The (module, name) of the app or router an expression refers to.
+        if depth > 16 or module not in self.modules:
+            return None
+        head, rest = chain[0], chain[1:]
+        current = self.modules[module]
+        if head in current.factories:
+            return (module, head) if not rest else None
+        if head not in current.imports:
+            return None
+        target, attribute = current.imports[head]
+        if attribute is not None:
+            submodule = f"{target}.{attribute}" if target else attribute
+            if submodule in self.modules:
+                return self.resolve(submodule, rest, depth + 1) if rest else None
+            return self.resolve(target, (attribute,) + rest, depth + 1)
+        # A module alias: walk its attributes down to a submodule or a symbol.
+        while rest:
+            submodule = f"{target}.{rest[0]}" if target else rest[0]
+            if submodule not in self.modules:
+                return self.resolve(target, rest, depth + 1)
+            target, rest = submodule, rest[1:]
+        return None
+
+    def mount_prefixes(self) -> Dict[Tuple[str, str], Optional[List[str]]]:
+        # Every prefix each app and router is served under. A router mounted
+        # twice has two; an unmounted one has none; None means some prefix in
+        # the chain is not a literal, so its routes cannot be resolved.
+        parents: Dict[Tuple[str, str], List[Tuple[Tuple[str, str], Optional[str]]]] = {}
+        for name, module in self.modules.items():
+            for owner, router, call in module.mounts:
+                parent, child = self.resolve(name, owner), self.resolve(name, router)
+                if parent is not None and child is not None:
+                    parents.setdefault(child, []).append((parent, _literal_prefix(call)))
+
+        resolved: Dict[Tuple[str, str], Optional[List[str]]] = {}
+
+        def prefixes(key, stack) -> Optional[List[str]]:
+            if key in resolved:
+                return resolved[key]
+            kind, factory = self.modules[key[0]].factories[key[1]]
+            if kind == "app":
+                resolved[key] = [""]
+                return resolved[key]
+            own = _literal_prefix(factory)
+            if own is None or key in stack:
+                return None
+            found: Optional[List[str]] = []
+            for parent, mount in parents.get(key, []):
+                above = prefixes(parent, stack | {key})
+                if above is None or mount is None:
+                    found = None
+                    break
+                found.extend(prefix + mount + own for prefix in above)
+            resolved[key] = found
+            return found
+
+        for name, module in self.modules.items():
+            for symbol in module.factories:
+                prefixes((name, symbol), frozenset())
+        return resolved
+
+# Parsed modules by file path, plus the stat signature and content hash they
+# were built from.
+_module_cache: Dict[str, Tuple[tuple, str, TemplateModule]] = {}
+
+def _load_module(path: str, name: str, is_package: bool, root: str) -> Tuple[TemplateModule, str]:
+    # Re-parses one module only when its content changed. A cheap stat check
+    # guards the common case; a content hash rules out spurious re-parses.
+    st = os.stat(path)
+    signature = (st.st_mtime_ns, st.st_size)
+    cached = _module_cache.get(path)
+    if cached is not None and cached[0] == signature and cached[2].name == name:
+        return cached[2], cached[1]
+    with open(path, "rb") as src:
+        raw = src.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    if cached is None or cached[1] != digest or cached[2].name != name:
+        started = time.perf_counter()
+        module = TemplateModule(name, raw.decode("utf-8"), is_package, root)
+        note_stage("mutation.parse", started)
+    else:
+        module = cached[2]
+    _module_cache[path] = (signature, digest, module)
+    return module, digest
+
+def module_files(template_path: str) -> Dict[str, Tuple[str, bool]]:
+    # Bundle-relative module name -> (file, is_package) for a package template.
+    files: Dict[str, Tuple[str, bool]] = {}
+    for directory, subdirs, names in os.walk(template_path):
+        subdirs[:] = sorted(d for d in subdirs if d != "__pycache__" and not d.startswith("."))
+        relative = os.path.relpath(directory, template_path)
+        package = "" if relative == "." else relative.replace(os.sep, ".")
+        for filename in sorted(names):
+            if not filename.endswith(".py"):
+                continue
+            if filename == "__init__.py":
+                files[package] = (os.path.join(directory, filename), True)
+            else:
+                stem = filename[:-3]
+                files[f"{package}.{stem}" if package else stem] = (os.path.join(directory, filename), False)
+    return files
+
+def load_template_package(template_path: str) -> TemplatePackage:
+    # A single module is its own template; a directory is a package of them.
+    if os.path.isfile(template_path):
+        name = os.path.splitext(os.path.basename(template_path))[0]
+        module, digest = _load_module(template_path, name, False, name)
+        return TemplatePackage(name, {name: module}, {name: digest}, bundled=False)
+
+    root = os.path.basename(os.path.normpath(template_path))
+    if not root.isidentifier():
+        root = FALLBACK_ROOT
+    modules, digests = {}, {}
+    for name, (path, is_package) in module_files(template_path).items():
+        modules[name], digests[name] = _load_module(path, name, is_package, root)
+    for stale in [path for path in _module_cache if path.startswith(os.path.join(template_path, ""))
+                  and not os.path.exists(path)]:
+        del _module_cache[stale]
+    return TemplatePackage(root, modules, digests, bundled=True)
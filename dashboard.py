@@ -2,7 +2,6 @@ import streamlit as st
 import graphviz
 import time
 import requests
-import os
 import json
 
 MUTATION_INTERVAL = 25
@@ -26,50 +25,69 @@ st.markdown("""
 
 st.title("🦎 CHAMELEON: ACTIVE DEFENSE SYSTEM")
 
+# Everything below is drawn from one compact telemetry snapshot served by the
+# proxy (rebuilt there at most twice a second), instead of reading state files
+# or inferring the active node from the wall clock.
+METRICS_URL = "http://127.0.0.1:8000/_chameleon/metrics"
+REPLAY_ALERT_WINDOW = 10  # seconds an intrusion keeps the alert banner up
+# Banner wording per intrusion class reported by the proxy.
+INTRUSION_LABELS = {"live-token": "LEAKED LIVE ROUTE", "stale-replay": "REPLAY ATTACK", "near-miss": "FORGED ROUTE PROBE", "never-valid": "ROUTE SCAN"}
+
+def load_snapshot():
+    try:
+        return requests.get(METRICS_URL, timeout=1).json()
+    except Exception:
+        return None
+
+snapshot = load_snapshot()
+
 # Basic liveness check to show whether the proxy/backend cluster is up.
-try:
-    requests.get("http://127.0.0.1:8000/", timeout=2)
+if snapshot is not None:
     status_html = '<div class="status-box success">CLOUD STATUS: 🟢 OPERATIONAL | BACKEND: ONLINE</div>'
-except:
+else:
     status_html = '<div class="status-box error">CLOUD STATUS: 🔴 BOOTING DEFENSE ENGINE...</div>'
 
 st.markdown(status_html, unsafe_allow_html=True)
 
+snapshot = snapshot or {}
+now = time.time()
+interval = snapshot.get("mutation_interval", MUTATION_INTERVAL)
+# Routes rotate on their own schedules; the proxy reports when the next one is due.
+next_rotation = snapshot.get("next_rotation_at") or snapshot.get("last_rotation_at", now) + interval
+time_left = max(0, int(next_rotation - now))
+under_attack = now - snapshot.get("last_intrusion_at", 0) < REPLAY_ALERT_WINDOW
+counters = snapshot.get("counters", {})
+histograms = snapshot.get("histograms", {})
+
 col1, col2 = st.columns([3, 2])
 
 with col1:
     st.subheader("Runtime Topology")
 
-    # Build a lightweight topology visualization to show which node is active
-    # and how close the system is to the next mutation cycle.
+    # Build a lightweight topology visualization showing which node currently
+    # serve the active mutation generation.
     graph = graphviz.Digraph()
     graph.attr(bgcolor='#0e1117', rankdir='LR')
     graph.attr('node', style='filled', fontcolor='black', fontname='Courier')
     graph.attr('edge', color='white')
 
-    timestamp = time.time()
-    seconds = int(timestamp)
-
-    cycle = (seconds // MUTATION_INTERVAL) % 2
-    time_left = MUTATION_INTERVAL - (seconds % MUTATION_INTERVAL)
-
     graph.node('H', 'BOTNET\n(Internal)', fillcolor='#ff4b4b', fontcolor='white')
-    graph.node('P', 'PROXY\n(Gateway)', fillcolor='#0078ff', fontcolor='white')
-
-    # Alternate which node appears active based on the mutation cycle.
-    if cycle == 0:
-        graph.node('A', 'NODE A (8001)\n[ACTIVE]', fillcolor='#00ff41')
-        graph.node('B', 'NODE B (8002)\n[MUTATING...]', fillcolor='#555555', fontcolor='white')
-        graph.edge('P', 'A', color='#00ff41', penwidth='3')
-        graph.edge('P', 'B', style='dashed', color='#555555')
-    else:
-        graph.node('A', 'NODE A (8001)\n[MUTATING...]', fillcolor='#555555', fontcolor='white')
-        graph.node('B', 'NODE B (8002)\n[ACTIVE]', fillcolor='#00ff41')
-        graph.edge('P', 'A', style='dashed', color='#555555')
-        graph.edge('P', 'B', color='#00ff41', penwidth='3')
-
-    # When mutation is imminent, represent stale-token replay attempts visually.
-    if time_left < 6:
+    graph.node('P', f'PROXY\n(Gateway)\nGEN {snapshot.get("generation", "?")}', fillcolor='#0078ff', fontcolor='white')
+
+    for node in snapshot.get("nodes", []):
+        port = node["url"].rsplit(":", 1)[-1]
+        if node.get("active"):
+            graph.node(node["name"], f'NODE {node["name"]} ({port})\n[ACTIVE]', fillcolor='#00ff41')
+            graph.edge('P', node["name"], color='#00ff41', penwidth='3')
+        elif node.get("healthy", True):
+            graph.node(node["name"], f'NODE {node["name"]} ({port})\n[STANDBY]', fillcolor='#555555', fontcolor='white')
+            graph.edge('P', node["name"], style='dashed', color='#555555')
+        else:
+            graph.node(node["name"], f'NODE {node["name"]} ({port})\n[DOWN]', fillcolor='#8b0000', fontcolor='white')
+            graph.edge('P', node["name"], style='dotted', color='#8b0000')
+
+    # Recent honeypot hits are drawn as replay attempts against the proxy.
+    if under_attack:
         graph.edge('H', 'P', label='Replay Attack\n(Stale Token)', color='#ff4b4b', penwidth='2')
     else:
         graph.edge('H', 'P', label='Scanning...', color='white', style='dotted')
@@ -82,18 +100,17 @@ with col2:
     # Display the countdown until the next mutation event.
     st.metric("NEXT MUTATION IN", f"{time_left} seconds")
 
-    # Location where the proxy and mutator store the active route mapping.
-    STATE_PATH = "/tmp/mutation_state.json"
+    m1, m2, m3 = st.columns(3)
+    m1.metric("FORWARDED", counters.get("forwards", 0))
+    m2.metric("INTRUSIONS", counters.get("intrusions", 0))
+    m3.metric("TARPITTED", snapshot.get("tarpit", {}).get("occupancy", 0))
 
-    def load_routes():
-        # Read the current mutation state so the dashboard reflects live routing.
-        try:
-            with open(STATE_PATH, "r") as f:
-                return json.load(f)
-        except:
-            return {}
+    m4, m5 = st.columns(2)
+    m4.metric("FORWARD p95", f'{histograms.get("forward_latency", {}).get("p95_ms", 0)} ms')
+    m5.metric("MUTATION p50", f'{histograms.get("mutation_duration", {}).get("p50_ms", 0)} ms')
 
-    routes = load_routes()
+    # Route mapping of the generation that is currently serving traffic.
+    routes = snapshot.get("routes", {})
 
     if routes:
         formatted = "\n".join([f"{k} -> {v}" for k, v in routes.items()])
@@ -104,16 +121,18 @@ with col2:
 
     st.markdown("---")
 
-    # Surface honeypot activation indicators when the system enters its critical phase.
-    if time_left < 6:
-        st.error("🚨 THREAT DETECTED: REPLAY ATTACK")
+    # Surface honeypot activation indicators while intrusions are being trapped.
+    if under_attack:
+        threat = INTRUSION_LABELS.get(snapshot.get("last_intrusion_class", ""), "REPLAY ATTACK")
+        st.error(f"🚨 THREAT DETECTED: {threat}")
         st.warning("⚠️ HONEYPOT ACTIVATED")
         st.code(
-            """{
-  "status": "TRAP_DOOR_ACTIVATED",
-  "action": "LOGGING_IP_ADDRESS",
-  "payload": "POISON_PILL_v9"
-}""",
+            json.dumps({
+                "status": "TRAP_DOOR_ACTIVATED",
+                "action": "LOGGING_IP_ADDRESS",
+                "path": snapshot.get("last_intrusion_path", ""),
+                "classification": snapshot.get("last_intrusion_class", ""),
+            }, indent=2),
             language="json",
         )
     else:
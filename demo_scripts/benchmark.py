@@ -0,0 +1,275 @@
+# demo_scripts/benchmark.py
+# Load generator and latency benchmark for the proxy and the mutation cycle.
+# It boots the mutator, both backend nodes and the proxy locally (or targets an
+# already running stack with --no-spawn), drives concurrent asyncio traffic made
+# of valid mapped routes, stale/replayed mutated routes and unknown paths, and
+# reports throughput plus p50/p95/p99 latency per route class. Samples taken
+# close to a mutation rotation are reported in their own window so rotation
+# spikes stand out. Results are written as JSON for regression tracking.
+#
+#   python -m demo_scripts.benchmark --duration 60 --concurrency 64 --output bench_results.json
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import secrets
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+from colorama import Fore, Style, init
+
+init(autoreset=True)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, "core"))
+
+from mutator import load_template_skeleton  # type: ignore
+
+PROXY_URL = "http://127.0.0.1:8000"
+METRICS_PATH = "/_chameleon/metrics"
+ROUTE_CLASSES = ("valid", "stale", "unknown")
+
+# Attack-style traffic is sent from a second loopback address so the proxy's
+# reputation tracking and tarpit only ever see the "attacker" as suspicious,
+# and valid-route latency is not polluted by penalties aimed at probes.
+VALID_SOURCE = "127.0.0.1"
+ATTACK_SOURCE = "127.0.0.2"
+
+def log(source, msg, color=Fore.WHITE):
+    # Simple colored logging wrapper, matching the other demo scripts.
+    print(f"{color}[{source}] {msg}{Style.RESET_ALL}")
+
+def parse_mix(text: str) -> Dict[str, float]:
+    # "valid=0.7,stale=0.2,unknown=0.1" -> normalized weights.
+    weights = {name: 0.0 for name in ROUTE_CLASSES}
+    for part in text.split(","):
+        name, _, value = part.partition("=")
+        if name.strip() not in weights:
+            raise ValueError(f"unknown route class {name!r}")
+        weights[name.strip()] = float(value)
+    total = sum(weights.values())
+    return {name: weight / total for name, weight in weights.items()}
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    # Nearest-rank percentile on an already sorted list.
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+def concrete_path(template_path: str) -> str:
+    # Fills path parameters with a plausible value: /api/accounts/{id} -> /api/accounts/1
+    return re.sub(r"\{[^}]+\}", "1", template_path)
+
+class RouteCatalog:
+    # Tracks the public routes worth hitting and every mutated path ever
+    # published, and notices each rotation through the proxy's metrics snapshot
+    # (generations are handed over in memory, so disk snapshots may be off).
+    def __init__(self):
+        skeleton = load_template_skeleton()
+        self.valid = [
+            concrete_path(path) for path, methods in skeleton.route_methods.items() if "GET" in methods
+        ]
+        self.stale: List[str] = []
+        self._seen = set()
+        self._generation = None
+        self.rotations: List[float] = []
+
+    async def refresh(self, client: httpx.AsyncClient):
+        try:
+            snapshot = (await client.get(METRICS_PATH)).json()
+        except (httpx.HTTPError, ValueError):
+            return
+        generation = snapshot.get("generation")
+        if generation == self._generation:
+            return
+        if self._generation is not None:
+            # Place the rotation at the time the proxy reports, not when the
+            # (cached) snapshot happened to be read.
+            age = max(0.0, time.time() - snapshot.get("last_rotation_at", time.time()))
+            self.rotations.append(time.perf_counter() - age)
+        self._generation = generation
+        for original, mutated in snapshot.get("routes", {}).items():
+            if mutated != original and mutated not in self._seen:
+                self._seen.add(mutated)
+                self.stale.append(concrete_path(mutated))
+
+    def pick(self, route_class: str) -> str:
+        if route_class == "valid":
+            return random.choice(self.valid)
+        if route_class == "stale" and self.stale:
+            return random.choice(self.stale)
+        return f"/{secrets.token_hex(4)}/{secrets.token_hex(3)}"
+
+async def watch_rotations(catalog: RouteCatalog, client: httpx.AsyncClient, stop: asyncio.Event):
+    while not stop.is_set():
+        await catalog.refresh(client)
+        await asyncio.sleep(0.05)
+
+async def worker(clients: Dict[str, httpx.AsyncClient], catalog: RouteCatalog, mix: Dict[str, float],
+                 deadline: float, samples: list):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.perf_counter() < deadline:
+        route_class = random.choices(names, weights)[0]
+        client = clients["valid" if route_class == "valid" else "attack"]
+        path = catalog.pick(route_class)
+        started = time.perf_counter()
+        try:
+            resp = await client.get(path)
+            await resp.aread()
+            status = resp.status_code
+        except httpx.HTTPError:
+            status = 0
+        samples.append((started, route_class, time.perf_counter() - started, status))
+
+def summarize(samples: list, rotations: List[float], window: float, elapsed: float) -> Dict:
+    # Splits samples into steady-state and rotation windows and reports
+    # throughput and latency percentiles (milliseconds) per route class.
+    def near_rotation(started: float) -> bool:
+        return any(abs(started - rotated) <= window for rotated in rotations)
+
+    def describe(rows: list) -> Dict:
+        latencies = sorted(row[2] * 1000 for row in rows)
+        return {
+            "requests": len(rows),
+            "errors": sum(1 for row in rows if row[3] == 0 or row[3] >= 500),
+            "throughput_rps": round(len(rows) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+        }
+
+    report = {"overall": {}, "steady": {}, "rotation": {}}
+    for route_class in ROUTE_CLASSES:
+        rows = [row for row in samples if row[1] == route_class]
+        report["overall"][route_class] = describe(rows)
+        report["steady"][route_class] = describe([row for row in rows if not near_rotation(row[0])])
+        report["rotation"][route_class] = describe([row for row in rows if near_rotation(row[0])])
+    report["overall"]["all"] = describe(samples)
+    return report
+
+def spawn_stack(args) -> List[subprocess.Popen]:
+    # Mirrors start.sh without the dashboard and hacker bot.
+    env = dict(os.environ)
+    env.update({
+        "PYTHONUNBUFFERED": "1",
+        "CHAMELEON_RELOAD_POLL": "0",
+        "CHAMELEON_MUTATION_INTERVAL": str(args.mutation_interval),
+        "CHAMELEON_EVENT_CONSOLE": "0",
+    })
+    # Like start.sh: the nodes only take generations pushed with this token.
+    if not env.get("CHAMELEON_CONTROL_TOKEN"):
+        env["CHAMELEON_CONTROL_TOKEN"] = secrets.token_hex(32)
+    quiet = {"stdout": subprocess.DEVNULL, "stderr": subprocess.STDOUT, "cwd": BASE_DIR, "env": env}
+    subprocess.run([sys.executable, "-m", "core.mutator"], check=True, **quiet)
+    processes = [
+        subprocess.Popen([sys.executable, "-m", "uvicorn", "dynamic_server:app", "--port", port, "--no-access-log"], **quiet)
+        for port in ("8001", "8002")
+    ]
+    processes.append(subprocess.Popen([sys.executable, "-m", "core.proxy"], **quiet))
+    return processes
+
+async def wait_until_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{url}/", timeout=1.0)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"proxy at {url} did not become ready within {timeout}s")
+
+async def run_benchmark(args) -> Dict:
+    mix = parse_mix(args.mix)
+    catalog = RouteCatalog()
+    await wait_until_ready(args.proxy_url)
+    # Telemetry is served to loopback callers only, from the default source.
+    telemetry = httpx.AsyncClient(base_url=args.proxy_url, timeout=args.timeout)
+    await catalog.refresh(telemetry)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    clients = {
+        name: httpx.AsyncClient(
+            base_url=args.proxy_url,
+            limits=limits,
+            timeout=args.timeout,
+            transport=httpx.AsyncHTTPTransport(local_address=source, limits=limits),
+        )
+        for name, source in (("valid", VALID_SOURCE), ("attack", ATTACK_SOURCE))
+    }
+
+    log("BENCH", f"Running {args.concurrency} workers for {args.duration}s (mix {args.mix})...", Fore.CYAN)
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_rotations(catalog, telemetry, stop))
+    samples: list = []
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(worker(clients, catalog, mix, deadline, samples) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await watcher
+    for client in (*clients.values(), telemetry):
+        await client.aclose()
+
+    report = summarize(samples, catalog.rotations, args.rotation_window, elapsed)
+    report["config"] = {
+        "duration_s": args.duration,
+        "concurrency": args.concurrency,
+        "mix": mix,
+        "mutation_interval_s": args.mutation_interval if not args.no_spawn else None,
+        "rotation_window_s": args.rotation_window,
+        "rotations_observed": len(catalog.rotations),
+        "elapsed_s": round(elapsed, 3),
+        "timestamp": time.time(),
+    }
+    return report
+
+def print_report(report: Dict):
+    for window in ("overall", "steady", "rotation"):
+        log("BENCH", f"{window}:", Fore.YELLOW)
+        for route_class, row in report[window].items():
+            print(f"  {route_class:<8} n={row['requests']:<7} err={row['errors']:<5} "
+                  f"rps={row['throughput_rps']:<9} p50={row['p50_ms']:<8} p95={row['p95_ms']:<8} p99={row['p99_ms']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Chameleon proxy load and latency benchmark")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load to generate")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent asyncio workers")
+    parser.add_argument("--mix", default="valid=0.7,stale=0.2,unknown=0.1", help="route class weights")
+    parser.add_argument("--mutation-interval", type=float, default=5.0, help="mutation interval for the spawned proxy")
+    parser.add_argument("--rotation-window", type=float, default=0.5, help="seconds either side of a rotation")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request timeout")
+    parser.add_argument("--proxy-url", default=PROXY_URL)
+    parser.add_argument("--no-spawn", action="store_true", help="benchmark an already running stack")
+    parser.add_argument("--output", default="bench_results.json", help="machine-readable results file")
+    args = parser.parse_args()
+
+    processes = [] if args.no_spawn else spawn_stack(args)
+    try:
+        report = asyncio.run(run_benchmark(args))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    print_report(report)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    log("BENCH", f"Results written to {args.output}", Fore.GREEN)
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,282 @@
 # dynamic_server.py
-# This loader is responsible for pulling in the most recently mutated FastAPI
-# application from /tmp/active_server.py. Uvicorn imports this file and picks up
-# whatever version of the app the mutation engine generated at runtime.
+# This loader hosts the mutated FastAPI application inside a backend node.
+# The proxy hands each new mutation over in memory: it posts the generated source
+# to the control endpoint and the node builds the app from the request body.
+# The app sits behind a hot-swap wrapper, so each new mutation is picked up
+# inside the running node process instead of requiring a uvicorn restart.
+# A package template arrives the same way, as one bundle module that imports its
+# embedded submodules itself (see core/bundle.py).
+# /tmp/active_server.py is only a snapshot the node starts from when present
+# (and can follow with the optional file watcher when run standalone).
+# Each mutated app gets its own lifespan, as if uvicorn hosted it directly: its
+# startup runs before it is swapped in, and its shutdown after the app it
+# replaced has finished every request it was serving.
 
-import importlib.util
+import asyncio
+import hmac
+import json
 import os
 import time
 import traceback
+import types
+from typing import Dict, Optional
 
 RUNTIME_OUTPUT_PATH = "/tmp/active_server.py"
 
-def load_active_app(max_retries: int = 8, delay: float = 0.5):
-    # Continuously attempts to import the latest mutated server. This is needed
-    # because the mutator may not have produced the file yet when the system starts.
-    for i in range(max_retries):
-        try:
-            if not os.path.exists(RUNTIME_OUTPUT_PATH):
-                raise FileNotFoundError(f"{RUNTIME_OUTPUT_PATH} not present")
+# Control endpoint that forces an immediate reload. Only loopback callers (the
+# proxy and local tooling) may use it.
+RELOAD_PATH = "/_chameleon/reload"
+HEALTH_PATH = "/_chameleon/health"
+LOOPBACK_HOSTS = {"127.0.0.1", "::1", "localhost"}
+# Identifies this process to the proxy's health probes, so a node that restarted
+# (and therefore lost the generation it was warmed against) is recognised.
+BOOT_ID = f"{os.getpid()}-{time.time_ns()}"
+# The reload endpoint executes the source it receives, so only callers
+# presenting this token (the proxy) may use it. The loopback check alone proves
+# nothing: the proxy forwards client traffic to the node from 127.0.0.1. Without
+# a token the endpoint is disabled and the node only loads its disk snapshot.
+CONTROL_TOKEN = os.environ.get("CHAMELEON_CONTROL_TOKEN", "")
+if not CONTROL_TOKEN:
+    print("[DYNAMIC_SERVER][WARNING] CHAMELEON_CONTROL_TOKEN is not set; refusing all pushed reloads.")
+
+def _authorized(scope) -> bool:
+    presented = dict(scope["headers"]).get(b"x-chameleon-token", b"")
+    return bool(CONTROL_TOKEN) and hmac.compare_digest(presented, CONTROL_TOKEN.encode("latin-1"))
+
+# The file watcher polls the runtime output's mtime; set the interval to 0 to
+# disable it and rely solely on the control endpoint.
+WATCH_INTERVAL = float(os.environ.get("CHAMELEON_RELOAD_POLL", "0.5"))
+# Bounds a hosted app's startup or shutdown, and how long a replaced app may
+# keep serving in-flight requests before it is shut down regardless.
+LIFESPAN_TIMEOUT = float(os.environ.get("CHAMELEON_LIFESPAN_TIMEOUT", "30"))
+DRAIN_TIMEOUT = float(os.environ.get("CHAMELEON_DRAIN_TIMEOUT", "30"))
+
+def _build_app(source: str, origin: str):
+    # Executes mutated source in a fresh module namespace and returns its app.
+    module = types.ModuleType("active_server")
+    module.__file__ = origin
+    exec(compile(source, origin, "exec"), module.__dict__)
+
+    if not hasattr(module, "app"):
+        raise AttributeError("mutated module does not expose 'app'")
+    return module.app
+
+def _import_app(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return _build_app(f.read(), path)
 
-            spec = importlib.util.spec_from_file_location("active_server", RUNTIME_OUTPUT_PATH)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+def load_active_app():
+    # Starts from the on-disk snapshot when there is one. Without it the node
+    # comes up empty and answers 503 until the proxy pushes a generation, so
+    # startup never blocks on the mutator having written a file.
+    if not os.path.exists(RUNTIME_OUTPUT_PATH):
+        print(f"[DYNAMIC_SERVER] No snapshot at {RUNTIME_OUTPUT_PATH}; waiting for the proxy to push one.")
+        return None
+    try:
+        return _import_app(RUNTIME_OUTPUT_PATH)
+    except Exception as e:
+        print(f"[DYNAMIC_SERVER][ERROR] Failed loading snapshot, waiting for the proxy: {e}")
+        print(traceback.format_exc())
+        return None
 
-            if hasattr(module, "app"):
-                return module.app
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
 
-            raise AttributeError("mutated module does not expose 'app'")
+async def _send_json(send, status: int, payload: dict):
+    # Minimal raw ASGI JSON response for the control endpoint.
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
 
+class HostedApp:
+    # One mutated app plus the lifespan it is run under. The lifespan protocol
+    # is driven over a pair of queues, the way a server drives it; an app that
+    # exits or raises without answering startup does not support lifespan and
+    # is served without it.
+    def __init__(self, app):
+        self.app = app
+        self.state: dict = {}
+        self.inflight = 0
+        self.drain_deadline = 0.0
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self._outbox: asyncio.Queue = asyncio.Queue()
+        self._task = None
+
+    async def _run(self):
+        scope = {"type": "lifespan", "asgi": {"version": "3.0", "spec_version": "2.0"}, "state": self.state}
+        try:
+            await self.app(scope, self._inbox.get, self._outbox.put)
         except Exception as e:
-            # Only raise the error after exhausting all retry attempts.
-            if i == max_retries - 1:
-                print(f"[DYNAMIC_SERVER][ERROR] Final failure loading mutated server: {e}")
-                print(traceback.format_exc())
-                raise
-            time.sleep(delay)
+            await self._outbox.put({"type": "lifespan.exited", "message": str(e)})
+        else:
+            await self._outbox.put({"type": "lifespan.exited", "message": ""})
+
+    async def startup(self):
+        # Raises when the app reports its startup failed (or never finishes it).
+        self._task = asyncio.create_task(self._run())
+        await self._inbox.put({"type": "lifespan.startup"})
+        message = await asyncio.wait_for(self._outbox.get(), LIFESPAN_TIMEOUT)
+        if message["type"] == "lifespan.startup.failed":
+            raise RuntimeError(f"startup failed: {message.get('message', '')}")
+        if message["type"] == "lifespan.exited":
+            self._task = None
+
+    async def shutdown(self):
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        try:
+            await self._inbox.put({"type": "lifespan.shutdown"})
+            message = await asyncio.wait_for(self._outbox.get(), LIFESPAN_TIMEOUT)
+            if message["type"] == "lifespan.shutdown.failed":
+                print(f"[DYNAMIC_SERVER][ERROR] Retired app failed to shut down: {message.get('message', '')}")
+        except asyncio.TimeoutError:
+            print("[DYNAMIC_SERVER][ERROR] Retired app did not finish shutting down in time.")
+        task.cancel()
+
+    async def retire(self):
+        # Shuts the app down once the requests it was serving have finished.
+        self.drain_deadline = time.monotonic() + DRAIN_TIMEOUT
+        while self.inflight > 0 and time.monotonic() < self.drain_deadline:
+            await asyncio.sleep(0.05)
+        await self.shutdown()
 
-    raise RuntimeError("Unable to load mutated app")
+class HotSwapApp:
+    # ASGI entrypoint handed to uvicorn. Every request grabs the app reference
+    # that is current when it arrives and keeps using it until it completes, so
+    # swapping in a newly built app never interrupts requests already in flight.
+    def __init__(self, initial_app):
+        self._initial_app = initial_app
+        self.current = None
+        self.generation = 1 if initial_app is not None else 0
+        self._mtime = self._runtime_mtime()
+        self._reload_lock = asyncio.Lock()
+        self._watcher = None
+        self._retiring: Dict[HostedApp, asyncio.Task] = {}
+
+    @staticmethod
+    def _runtime_mtime():
+        try:
+            return os.stat(RUNTIME_OUTPUT_PATH).st_mtime_ns
+        except OSError:
+            return None
+
+    async def _start(self, app) -> HostedApp:
+        hosted = HostedApp(app)
+        await hosted.startup()
+        return hosted
+
+    def _retire(self, hosted: Optional[HostedApp]):
+        if hosted is not None:
+            self._retiring[hosted] = asyncio.create_task(hosted.retire())
+            self._retiring[hosted].add_done_callback(lambda task: self._retiring.pop(hosted, None))
+
+    async def reload(self, source: str = None) -> bool:
+        # Builds the new app off the event loop and runs its startup, then swaps
+        # the reference in a single assignment; the replaced app is shut down
+        # once it drains. Source handed over by the proxy is built straight
+        # from memory; without it the disk snapshot is re-read. A broken
+        # mutation, or one whose startup fails, leaves the previous app serving.
+        async with self._reload_lock:
+            mtime = self._runtime_mtime()
+            try:
+                if source is not None:
+                    new_app = await asyncio.to_thread(_build_app, source, f"<chameleon generation {self.generation + 1}>")
+                else:
+                    new_app = await asyncio.to_thread(_import_app, RUNTIME_OUTPUT_PATH)
+                hosted = await self._start(new_app)
+            except Exception as e:
+                print(f"[DYNAMIC_SERVER][ERROR] Reload failed, keeping generation {self.generation}: {e}")
+                return False
+            previous, self.current = self.current, hosted
+            self._retire(previous)
+            if source is None:
+                self._mtime = mtime
+            self.generation += 1
+            print(f"[DYNAMIC_SERVER] Hot-swapped mutated app (generation {self.generation})")
+            return True
+
+    async def _watch(self):
+        # Picks up new mutations written by the mutator without a restart.
+        while True:
+            await asyncio.sleep(WATCH_INTERVAL)
+            mtime = self._runtime_mtime()
+            if mtime is not None and mtime != self._mtime:
+                await self.reload()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self._initial_app is not None:
+                    try:
+                        self.current = await self._start(self._initial_app)
+                    except Exception as e:
+                        print(f"[DYNAMIC_SERVER][ERROR] Snapshot app failed to start, waiting for the proxy: {e}")
+                        self.generation = 0
+                    self._initial_app = None
+                if WATCH_INTERVAL > 0:
+                    self._watcher = asyncio.create_task(self._watch())
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._watcher is not None:
+                    self._watcher.cancel()
+                # Apps still draining stop waiting and shut down alongside the
+                # current one.
+                for hosted in self._retiring:
+                    hosted.drain_deadline = 0.0
+                await asyncio.gather(
+                    *self._retiring.values(), *([self.current.shutdown()] if self.current is not None else []),
+                )
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+
+        if scope["type"] == "http" and scope["path"] in (RELOAD_PATH, HEALTH_PATH):
+            client = scope.get("client") or ("", 0)
+            if client[0] not in LOOPBACK_HOSTS:
+                await _send_json(send, 403, {"error": "forbidden"})
+                return
+            if scope["path"] == HEALTH_PATH:
+                await _send_json(send, 200, {
+                    "ok": True, "loaded": self.current is not None, "generation": self.generation, "boot": BOOT_ID,
+                })
+                return
+            if not _authorized(scope):
+                await _send_json(send, 403, {"error": "forbidden"})
+                return
+            body = await _read_body(receive)
+            reloaded = await self.reload(body.decode("utf-8") if body else None)
+            await _send_json(send, 200 if reloaded else 500, {"reloaded": reloaded, "generation": self.generation})
+            return
+
+        hosted = self.current
+        if hosted is None:
+            if scope["type"] == "http":
+                await _send_json(send, 503, {"error": "node warming up"})
+            return
+        if hosted.state:
+            # Whatever the app's lifespan stored, as uvicorn would hand it over.
+            scope = {**scope, "state": hosted.state.copy()}
+        hosted.inflight += 1
+        try:
+            await hosted.app(scope, receive, send)
+        finally:
+            hosted.inflight -= 1
 
 # The app is loaded as soon as this module is imported so that uvicorn
 # (via `uvicorn dynamic_server:app`) always receives the current mutated instance.
-app = load_active_app()
+app = HotSwapApp(load_active_app())
@@ -1,6 +1,6 @@
 #!/usr/bin/env bash
 # start.sh — orchestrates the full defense environment: mutation engine,
-# dual backend nodes, proxy layer, attacker simulator, and the dashboard.
+# backend node pool, proxy layer, attacker simulator, and the dashboard.
 set -euo pipefail
 
 echo "🚀 Booting Chameleon Defense System..."
@@ -47,11 +47,26 @@ else
     echo "[startup][warning] Mutated runtime server not found at ${RUNTIME_MUTATED}. Proceeding..."
 fi
 
-echo "⚙️ Starting Server Node A..."
-python -m uvicorn dynamic_server:app --port 8001 --host 0.0.0.0 &
-
-echo "⚙️ Starting Server Node B..."
-python -m uvicorn dynamic_server:app --port 8002 --host 0.0.0.0 &
+# Nodes only accept pushed generations from callers holding this token; it is
+# generated per run unless one is supplied.
+if [ -z "${CHAMELEON_CONTROL_TOKEN:-}" ]; then
+    CHAMELEON_CONTROL_TOKEN=$(python -c 'import secrets; print(secrets.token_hex(32))')
+fi
+export CHAMELEON_CONTROL_TOKEN
+
+# The proxy decides when each node hot-swaps to a new mutation (see the grace
+# window in core/proxy.py), so the nodes' own file watchers are disabled.
+export CHAMELEON_RELOAD_POLL=0
+
+# One backend node per port; the proxy splits them into two rotating cohorts.
+NODE_PORTS=${CHAMELEON_NODE_PORTS:-"8001 8002"}
+CHAMELEON_NODES=""
+for port in $NODE_PORTS; do
+    echo "⚙️ Starting Server Node on port ${port}..."
+    python -m uvicorn dynamic_server:app --port "$port" --host 0.0.0.0 &
+    CHAMELEON_NODES="${CHAMELEON_NODES:+${CHAMELEON_NODES},}http://127.0.0.1:${port}"
+done
+export CHAMELEON_NODES
 
 echo "⚙️ Starting Proxy..."
 python -m core.proxy &
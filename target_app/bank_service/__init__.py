@@ -0,0 +1,2 @@
+# Package form of the bank template: the app in main.py mounts the account and
+# payment routers. Select it with CHAMELEON_TEMPLATE=target_app/bank_service.
@@ -0,0 +1,20 @@
+from fastapi import FastAPI
+
+from .routers import accounts, payments
+
+app = FastAPI()
+
+# Both routers sit under /api; the mutator resolves the full path of every
+# route through these mounts and renames each one on its own.
+app.include_router(accounts.router, prefix="/api")
+app.include_router(payments.router, prefix="/api")
+
+@app.get("/admin/login")
+async def admin_login():
+    return {"status": "Login Page", "auth_token": "X99-KEY", "version": "1.0"}
+
+# The root endpoint is intentionally left untouched by mutation—it's used by the dashboard,
+# health checks, and boot diagnostics to confirm the system is online.
+@app.get("/")
+def home():
+    return {"message": "Welcome to the Bank. System Operational."}
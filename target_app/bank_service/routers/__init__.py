@@ -0,0 +1 @@
+# Routers mounted by ..main.
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+
+router = APIRouter(prefix="/accounts")
+
+@router.get("")
+async def list_accounts():
+    return {"accounts": [{"account_id": 1, "owner": "admin"}, {"account_id": 2, "owner": "ops"}]}
+
+@router.get("/{account_id}")
+async def get_account(account_id: int):
+    return {"account_id": account_id, "owner": "admin", "status": "active"}
+
+@router.patch("/{account_id}")
+async def update_account(account_id: int, status: str):
+    return {"account_id": account_id, "status": status}
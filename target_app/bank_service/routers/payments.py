@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+
+router = APIRouter()
+
+@router.get("/balance")
+async def get_balance():
+    return {"user": "admin", "balance": 4500000, "currency": "USD"}
+
+@router.api_route("/transfer", methods=["POST", "PUT"])
+async def transfer_money(amount: int):
+    return {"status": "success", "transferred": amount}
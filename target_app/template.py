@@ -13,6 +13,10 @@ def admin_login():
 def get_balance():
     return {"user": "admin", "balance": 4500000, "currency": "USD"}
 
+@app.get("/api/accounts/{account_id}")
+def get_account(account_id: int):
+    return {"account_id": account_id, "owner": "admin", "status": "active"}
+
 @app.post("/api/transfer")
 def transfer_money(amount: int):
     return {"status": "success", "transferred": amount}
@@ -0,0 +1,52 @@
+# tests/test_metrics.py
+# Adding up per-worker telemetry: Metrics/Histogram export and absorb, and the
+# shared board workers post it to.
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "core"))
+
+from metrics import Metrics  # type: ignore
+from shared import MetricsBoard  # type: ignore
+
+def _worker(forwards: int, latency_ms: float, intrusion_at: float = 0.0) -> Metrics:
+    metrics = Metrics()
+    for _ in range(forwards):
+        metrics.incr("forwards")
+        metrics.observe("forward_latency", latency_ms)
+    if intrusion_at:
+        metrics.intrusion(f"/probe{intrusion_at}", "stale-replay")
+        metrics.last_intrusion_at = intrusion_at
+    return metrics
+
+def test_absorb_adds_counters_and_histograms():
+    combined = Metrics()
+    for worker in (_worker(3, 1.0), _worker(5, 100.0)):
+        combined.absorb(worker.export())
+    snapshot = combined.snapshot()
+    assert snapshot["counters"]["forwards"] == 8
+    assert snapshot["histograms"]["forward_latency"]["count"] == 8
+    assert snapshot["histograms"]["forward_latency"]["p50_ms"] > 1.0
+
+def test_absorb_keeps_the_latest_intrusion_and_rotation():
+    early, late = _worker(0, 0.0, intrusion_at=10.0), _worker(0, 0.0, intrusion_at=20.0)
+    late.last_rotation_at, early.last_rotation_at = 5.0, 7.0
+    combined = Metrics()
+    combined.absorb(late.export())
+    combined.absorb(early.export())
+    assert combined.last_intrusion_path == "/probe20.0"
+    assert combined.last_rotation_at == 7.0
+    assert combined.counters["intrusions_stale_replay"] == 2
+
+def test_board_slots_are_claimed_once_and_read_back(tmp_path):
+    path = str(tmp_path / "board")
+    first, second = MetricsBoard(path, 2, slot_size=4096), MetricsBoard(path, 2, slot_size=4096)
+    assert first.claim() == 0
+    assert second.claim() == 1
+    assert MetricsBoard(path, 2, slot_size=4096).claim() is None
+    first.publish({"pid": 1, "metrics": _worker(2, 1.0).export()})
+    second.publish({"pid": 2, "metrics": _worker(4, 1.0).export()})
+    reports = first.read_all()
+    assert sorted(report["pid"] for report in reports.values()) == [1, 2]
+    assert sum(report["metrics"]["counters"]["forwards"] for report in reports.values()) == 6
@@ -0,0 +1,37 @@
+# tests/test_replay.py
+# ReplayIndex classification of requests that missed every live route.
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "core"))
+
+from replay import LIVE_TOKEN, NEAR_MISS, NEVER_VALID, STALE_REPLAY, ReplayIndex  # type: ignore
+
+def _index():
+    index = ReplayIndex(depth=4)
+    index.add_generation(1, {"/admin/login": "/admin/login_aaa111", "/api/balance": "/api/balance_bbb222"})
+    # A patch: only /admin/login is renamed, /api/balance keeps its token.
+    index.add_generation(2, {"/admin/login": "/admin/login_ccc333", "/api/balance": "/api/balance_bbb222"})
+    return index
+
+def test_current_tokens_are_live_not_replays():
+    index = _index()
+    assert index.classify("/admin/login_ccc333") == (LIVE_TOKEN, 2)
+    # Kept by the patch, so it is live in the current generation too.
+    assert index.classify("/api/balance_bbb222") == (LIVE_TOKEN, 2)
+
+def test_retired_tokens_are_replays():
+    assert _index().classify("/admin/login_aaa111") == (STALE_REPLAY, 1)
+
+def test_a_new_generation_turns_live_tokens_into_replays():
+    index = _index()
+    index.add_generation(3, {"/admin/login": "/admin/login_ddd444", "/api/balance": "/api/balance_eee555"})
+    assert index.classify("/admin/login_ccc333") == (STALE_REPLAY, 2)
+    assert index.classify("/api/balance_bbb222") == (STALE_REPLAY, 2)
+    assert index.classify("/admin/login_ddd444") == (LIVE_TOKEN, 3)
+
+def test_near_misses_and_noise():
+    index = _index()
+    assert index.classify("/admin/login_forged") == (NEAR_MISS, None)
+    assert index.classify("/wp-admin/setup.php") == (NEVER_VALID, None)
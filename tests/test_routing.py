@@ -0,0 +1,115 @@
+# tests/test_routing.py
+# RouteIndex lookups: templated segments, trailing slashes, greedy tails,
+# method matching and how captured values are spliced into mutated targets.
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "core"))
+
+from routing import RouteIndex  # type: ignore
+
+def _index(*routes):
+    return RouteIndex.from_routes(
+        {"methods": methods, "path": path, "target": target} for methods, path, target in routes
+    )
+
+def test_static_and_param_segments():
+    index = _index(
+        (["GET"], "/api/balance", "/api/balance_a1"),
+        (["GET"], "/api/accounts/{account_id}", "/api/accounts_b2/{account_id}"),
+        (["GET"], "/users/{user_id}/orders/{order_id}", "/users_c3/{user_id}/o/{order_id}"),
+    )
+    assert index.resolve("GET", "/api/balance") == "/api/balance_a1"
+    assert index.resolve("GET", "/api/accounts/7") == "/api/accounts_b2/7"
+    assert index.resolve("GET", "/users/1/orders/2") == "/users_c3/1/o/2"
+    assert index.route("GET", "/api/accounts/7") == "/api/accounts/{account_id}"
+    assert index.resolve("GET", "/api/accounts") is None
+    assert index.resolve("GET", "/api/accounts/7/extra") is None
+
+def test_static_segment_wins_over_param():
+    index = _index(
+        (["GET"], "/users/{user_id}", "/users_x/{user_id}"),
+        (["GET"], "/users/me", "/users_x/self"),
+    )
+    assert index.resolve("GET", "/users/me") == "/users_x/self"
+    assert index.resolve("GET", "/users/42") == "/users_x/42"
+
+def test_params_renamed_between_routes_sharing_a_branch():
+    index = _index(
+        (["GET"], "/items/{item_id}", "/items_q/{item_id}"),
+        (["DELETE"], "/items/{key}", "/items_r/{key}"),
+    )
+    assert index.resolve("GET", "/items/5") == "/items_q/5"
+    assert index.resolve("DELETE", "/items/5") == "/items_r/5"
+
+def test_trailing_slash_follows_the_declared_target():
+    index = _index(
+        (["GET"], "/docs/", "/docs_z/"),
+        (["GET"], "/api/status", "/api/status_z"),
+    )
+    assert index.resolve("GET", "/docs") == "/docs_z/"
+    assert index.resolve("GET", "/docs/") == "/docs_z/"
+    assert index.resolve("GET", "/api/status/") == "/api/status_z"
+    assert index.resolve("GET", "/") is None
+
+def test_greedy_tail_captures_the_remainder():
+    index = _index(
+        (["GET"], "/files/{file_path:path}", "/files_k/{file_path:path}"),
+        (["GET"], "/files/index", "/files_k/index_k"),
+    )
+    assert index.resolve("GET", "/files/a/b/c.txt") == "/files_k/a/b/c.txt"
+    assert index.resolve("GET", "/files/index") == "/files_k/index_k"
+    assert index.resolve("GET", "/files/index/more") == "/files_k/index/more"
+    assert index.route("GET", "/files/a/b") == "/files/{file_path:path}"
+    assert index.resolve("GET", "/files") is None
+
+def test_head_is_only_routed_where_declared():
+    # FastAPI's APIRoute registers exactly the declared methods; HEAD on a GET
+    # route is a 405 on the node, so the index does not advertise it.
+    index = _index(
+        (["GET"], "/api/balance", "/api/balance_a1"),
+        (["HEAD"], "/api/ping", "/api/ping_h"),
+    )
+    assert index.resolve("HEAD", "/api/balance") is None
+    assert index.resolve("head", "/api/ping") == "/api/ping_h"
+    assert index.resolve("GET", "/api/ping") is None
+
+def test_method_mismatch_is_a_miss():
+    index = _index(
+        (["POST"], "/api/transfer", "/api/transfer_t"),
+        (["GET"], "/api/accounts/{account_id}", "/api/accounts_b2/{account_id}"),
+    )
+    assert index.resolve("GET", "/api/transfer") is None
+    assert index.resolve("POST", "/api/transfer") == "/api/transfer_t"
+    assert index.resolve("PUT", "/api/accounts/7") is None
+    assert index.route("PUT", "/api/accounts/7") is None
+
+def test_mapping_without_methods_matches_any_method():
+    index = RouteIndex.from_mapping({"/api/balance": "/api/balance_a1"})
+    assert index.resolve("GET", "/api/balance") == "/api/balance_a1"
+    assert index.resolve("DELETE", "/api/balance") == "/api/balance_a1"
+
+def test_captured_values_are_percent_encoded():
+    index = _index(
+        (["GET"], "/users/{user_id}", "/users_x/{user_id}"),
+        (["GET"], "/files/{file_path:path}", "/files_k/{file_path:path}"),
+    )
+    # Request paths reach the index percent-decoded.
+    assert index.resolve("GET", "/users/1?admin=1") == "/users_x/1%3Fadmin%3D1"
+    assert index.resolve("GET", "/users/a#b") == "/users_x/a%23b"
+    assert index.resolve("GET", "/users/50%") == "/users_x/50%25"
+    assert index.resolve("GET", "/users/jo smith") == "/users_x/jo%20smith"
+    assert index.resolve("GET", "/files/a b/c?.txt") == "/files_k/a%20b/c%3F.txt"
+
+def test_dot_segments_are_a_miss():
+    index = _index(
+        (["GET"], "/users/{user_id}", "/users_x/{user_id}"),
+        (["GET"], "/files/{file_path:path}", "/files_k/{file_path:path}"),
+    )
+    assert index.resolve("GET", "/users/..") is None
+    assert index.resolve("GET", "/users/.") is None
+    assert index.resolve("GET", "/files/../../_chameleon/reload") is None
+    assert index.resolve("GET", "/files/a/./b") is None
+    assert index.route("GET", "/files/a/../b") is None
+    assert index.resolve("GET", "/files/a..b/c.") == "/files_k/a..b/c."
@@ -0,0 +1,69 @@
+# tests/test_schedule.py
+# RotationSchedule: phasing, coalescing, policy changes and the retry path the
+# mutation loop takes when a patch cannot be installed.
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "core"))
+
+from schedule import RotationSchedule  # type: ignore
+
+def test_routes_sharing_an_interval_are_spread_out():
+    schedule = RotationSchedule(coalesce=0.0)
+    schedule.sync({"/a": 30.0, "/b": 30.0, "/c": 30.0}, now=100.0)
+    assert schedule.due == {"/a": 110.0, "/b": 120.0, "/c": 130.0}
+    assert schedule.next_batch() == (110.0, ["/a"])
+
+def test_routes_due_close_together_are_coalesced():
+    schedule = RotationSchedule(coalesce=1.0)
+    schedule.sync({"/a": 10.0, "/slow": 60.0}, now=0.0)
+    schedule.due["/b"], schedule.intervals["/b"] = 10.5, 10.0
+    assert schedule.next_batch() == (10.5, ["/a", "/b"])
+
+def test_mark_rotated_reschedules_by_each_routes_interval():
+    schedule = RotationSchedule(coalesce=0.0)
+    schedule.sync({"/a": 10.0, "/b": 40.0}, now=0.0)
+    schedule.mark_rotated(["/a", "/b"], at=50.0)
+    assert schedule.due == {"/a": 60.0, "/b": 90.0}
+
+def test_sync_drops_removed_routes_and_rephases_changed_ones():
+    schedule = RotationSchedule(coalesce=0.0)
+    schedule.sync({"/a": 10.0, "/b": 10.0}, now=0.0)
+    schedule.sync({"/a": 10.0, "/c": 20.0}, now=3.0)
+    assert schedule.due == {"/a": 5.0, "/c": 23.0}
+    schedule.sync({"/a": 40.0, "/c": 20.0}, now=4.0)
+    assert schedule.due["/a"] == 44.0
+
+def test_empty_schedule_has_no_batch():
+    assert RotationSchedule().next_batch() == (float("inf"), [])
+
+def test_postponed_batch_waits_the_full_retry_after_the_lead():
+    # The loop starts working on a batch `lead` seconds before its tick; a
+    # retry must still leave `delay` seconds before that work starts again.
+    lead, delay = 2.0, 2.0
+    schedule = RotationSchedule(coalesce=0.0, lead=lead)
+    schedule.sync({"/a": 10.0}, now=0.0)
+    tick, due = schedule.next_batch()
+    now = tick - lead
+    schedule.postpone(due, now, delay)
+    retry_tick, retry_due = schedule.next_batch()
+    assert retry_due == ["/a"]
+    assert retry_tick - lead - now == delay
+
+def test_repeated_failures_keep_backing_off():
+    schedule = RotationSchedule(coalesce=0.0, lead=2.0)
+    schedule.sync({"/a": 10.0}, now=0.0)
+    now, starts = 0.0, []
+    for _ in range(5):
+        tick, due = schedule.next_batch()
+        now = max(now, tick - schedule.lead)  # the loop sleeps until the lead
+        starts.append(now)
+        schedule.postpone(due, now, 2.0)
+    assert all(later - earlier >= 2.0 for earlier, later in zip(starts, starts[1:]))
+
+def test_postpone_never_pulls_a_route_forward():
+    schedule = RotationSchedule(coalesce=0.0, lead=2.0)
+    schedule.sync({"/a": 100.0}, now=0.0)
+    schedule.postpone(["/a", "/gone"], now=0.0, delay=2.0)
+    assert schedule.due == {"/a": 100.0}